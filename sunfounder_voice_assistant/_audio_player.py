@@ -7,7 +7,7 @@ supporting both raw audio data and audio file playback with advanced buffering a
 import wave
 import threading
 import numpy as np
-from typing import Optional
+from typing import BinaryIO, Optional, Union
 from ._utils import redirect_error_2_null, cancel_redirect_error
 
 # Check PyAudio availability
@@ -33,7 +33,7 @@ class AudioPlayer:
         sample_rate (int): Audio sample rate in Hz (default: 22050).
         channels (int): Number of audio channels (1 for mono, 2 for stereo).
         gain (float): Volume gain factor (1.0 = original volume).
-        format (int): PyAudio format constant (default: pyaudio.paInt16).
+        format (int, optional): PyAudio format constant (default: None, meaning pyaudio.paInt16).
         timeout (float): Timeout in seconds for playback operations.
         enable_buffering (bool): Enable audio buffering to reduce noise artifacts.
         buffer_size (int): Minimum buffer size for playback in bytes.
@@ -46,7 +46,7 @@ class AudioPlayer:
         sample_rate: int = 22050,
         channels: int = 1,
         gain: float = 1.0,
-        format: int = pyaudio.paInt16,
+        format: Optional[int] = None,
         timeout: Optional[float] = None,
         enable_buffering: bool = True,
         buffer_size: int = 8192) -> None:
@@ -57,7 +57,7 @@ class AudioPlayer:
         self.sample_rate = sample_rate
         self.channels = channels
         self.gain = gain
-        self.format = format
+        self.format = pyaudio.paInt16 if format is None else format
         self._timeout = timeout
 
         # PyAudio instance and stream management
@@ -106,6 +106,26 @@ class AudioPlayer:
             exc_val (Exception): Exception value if any occurred.
             exc_tb (traceback): Exception traceback if any occurred.
         """
+        try:
+            self.close()
+        finally:
+            if self.old_stderr is not None:
+                cancel_redirect_error(self.old_stderr)
+                self.old_stderr = None
+
+    def open(self) -> None:
+        """Opens the output stream for long-lived use without a with statement.
+
+        Unlike the context manager, stderr is only silenced while the stream
+        is being opened. Call :meth:`close` when done.
+        """
+        self._open_stream()
+
+    def close(self) -> None:
+        """Stops playback and releases the stream and PyAudio.
+
+        The player can't be used again after closing.
+        """
         self.stop()
         if self._stream:
             try:
@@ -114,15 +134,12 @@ class AudioPlayer:
             except Exception as e:
                 print(f"Error closing stream: {e}")
                 pass
+            self._stream = None
         try:
             self._pyaudio.terminate()
         except Exception as e:
             print(f"Error terminating PyAudio: {e}")
             pass
-        finally:
-            if self.old_stderr is not None:
-                cancel_redirect_error(self.old_stderr)
-                self.old_stderr = None
 
     def _find_working_device(self, channels: int, sample_rate: int, audio_format: int) -> int:
         """Find a working output device.
@@ -175,6 +192,30 @@ class AudioPlayer:
         """
         return self.gain
 
+    @staticmethod
+    def _scale_samples(samples: np.ndarray, gain: float) -> np.ndarray:
+        """Scales samples by gain and clips them to the range of their dtype.
+
+        The multiply and clip run in place on a single float buffer, float32
+        for 8/16-bit samples and float64 for wider ones to keep precision.
+
+        Args:
+            samples (np.ndarray): Audio samples.
+            gain (float): Gain factor to apply.
+
+        Returns:
+            np.ndarray: Scaled samples with the original dtype.
+        """
+        dtype = samples.dtype
+        work_dtype = np.float32 if dtype.itemsize <= 2 else np.float64
+        scaled = np.multiply(samples, gain, dtype=work_dtype)
+        if np.issubdtype(dtype, np.integer):
+            info = np.iinfo(dtype)
+            np.clip(scaled, info.min, info.max, out=scaled)
+        else:
+            np.clip(scaled, -1.0, 1.0, out=scaled)
+        return scaled.astype(dtype)
+
     def _apply_gain(self, audio_bytes: bytes) -> bytes:
         """Applies gain to audio bytes with clipping prevention.
 
@@ -208,15 +249,7 @@ class AudioPlayer:
             audio_array = np.frombuffer(audio_bytes, dtype=dtype)
 
             # Apply gain with clipping to prevent distortion
-            audio_array = (audio_array * self.gain)
-
-            # Clip values to prevent overflow and underflow
-            max_val = np.iinfo(dtype).max
-            min_val = np.iinfo(dtype).min
-            audio_array = np.clip(audio_array, min_val, max_val)
-
-            # Convert back to original dtype
-            audio_array = audio_array.astype(dtype)
+            audio_array = self._scale_samples(audio_array, self.gain)
 
             # Convert back to bytes for playback
             return audio_array.tobytes()
@@ -282,7 +315,7 @@ class AudioPlayer:
             if play_size > 0:
                 # Extract buffer data for playback
                 play_data = bytes(self._audio_buffer[:play_size])
-                self._audio_buffer = self._audio_buffer[play_size:]
+                del self._audio_buffer[:play_size]  # Trim in place, no copy of the rest
 
                 # Play the data immediately
                 self._open_stream()
@@ -300,10 +333,9 @@ class AudioPlayer:
             play_size = (len(self._audio_buffer) // frame_size) * frame_size
 
             if play_size > 0:
-                # Apply gain to remaining buffer data
-                adjusted_audio = self._apply_gain(bytes(self._audio_buffer[:play_size]))
-                # Play remaining buffered data
-                self._stream.write(adjusted_audio)
+                # Gain was applied by play() before the data was buffered
+                self._open_stream()
+                self._stream.write(bytes(self._audio_buffer[:play_size]))
 
             # Clear the buffer
             self._audio_buffer = bytearray()
@@ -329,14 +361,15 @@ class AudioPlayer:
         self._playback_thread.daemon = True
         self._playback_thread.start()
 
-    def play_file(self, file_path: str, chunk_size: int = 4096) -> None:
+    def play_file(self, file_path: Union[str, BinaryIO], chunk_size: int = 4096) -> None:
         """Plays an audio file (WAV format) with buffered playback.
 
         This method reads and plays WAV audio files with proper format detection
         and buffering to ensure smooth playback.
 
         Args:
-            file_path (str): Path to the audio file (WAV format).
+            file_path (str | file-like): Path to the audio file (WAV format), or a
+                binary file object such as a pipe or ``io.BytesIO`` holding WAV data.
             chunk_size (int, optional): Size of audio chunks to read and play. Defaults to 4096.
 
         Raises:
@@ -412,7 +445,7 @@ class AudioPlayer:
                         while len(file_buffer) >= min_buffer_size and not self._stop_event.is_set():
                             # Extract buffer data for playback
                             play_data = bytes(file_buffer[:min_buffer_size])
-                            file_buffer = file_buffer[min_buffer_size:]
+                            del file_buffer[:min_buffer_size]
 
                             # Apply gain if needed
                             adjusted_data = self._apply_gain(play_data)
@@ -516,8 +549,8 @@ class AudioPlayer:
                 # Convert to numpy array for processing
                 audio_array = np.frombuffer(audio_data, dtype=dtype)
 
-                # Apply gain with automatic type conversion
-                audio_array = (audio_array * gain).astype(dtype)
+                # Apply gain with clipping, the same as playback
+                audio_array = self._scale_samples(audio_array, gain)
 
                 # Convert back to bytes
                 adjusted_data = audio_array.tobytes()
@@ -1,14 +1,20 @@
 import threading
 import sys
 import select
+from typing import Callable, Optional
 
 class KeyboardInput:
     """ Keyboard input thread """
-    def __init__(self) -> None:
-        """ Initialize the keyboard input thread """
+    def __init__(self, on_result: Optional[Callable[[], None]] = None) -> None:
+        """ Initialize the keyboard input thread
+
+        Args:
+            on_result (Callable[[], None], optional): Called from the thread once a result is ready
+        """
         self.thread = None
         self.running = False
         self.result = None
+        self.on_result = on_result
 
     def start(self) -> None:
         """ Start the keyboard input thread """
@@ -26,6 +32,8 @@ class KeyboardInput:
         while self.running:
             if select.select([sys.stdin], [], [], 0.1)[0]:
                 self.result = sys.stdin.readline().strip()
+                if self.on_result is not None:
+                    self.on_result()
                 break
 
         self.running = False
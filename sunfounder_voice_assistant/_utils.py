@@ -1,23 +1,36 @@
 
-def run_command(cmd: str, user: str=None, group: str=None) -> tuple:
+import atexit
+import os
+import shutil
+import subprocess
+import sys
+from typing import Union
+
+# Opened once and shared by every stderr redirection
+_DEVNULL_FD = os.open(os.devnull, os.O_WRONLY)
+atexit.register(os.close, _DEVNULL_FD)
+
+def run_command(cmd: Union[str, list], user: str=None, group: str=None) -> tuple:
     """ Run command and return status and output
 
+    Waits for the command to exit, so status is always its return code.
+
     Args:
-        cmd (str): command to run
+        cmd (str | list): command to run, a string runs through the shell,
+            a list of arguments runs directly without one
     Returns:
         tuple: status, output
     """
-    import subprocess
-    p = subprocess.Popen(
+    p = subprocess.run(
         cmd,
-        shell=True,
+        shell=isinstance(cmd, str),
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         user=user,
-        group=group)
-    result = p.stdout.read().decode('utf-8')
-    status = p.poll()
-    return status, result
+        group=group,
+        check=False)
+    result = p.stdout.decode('utf-8')
+    return p.returncode, result
 
 def check_executable(executable: str) -> bool:
     """ Check if executable is installed
@@ -27,10 +40,7 @@ def check_executable(executable: str) -> bool:
     Returns:
         bool: True if installed
     """
-    from distutils.spawn import find_executable
-    executable_path = find_executable(executable)
-    found = executable_path is not None
-    return found
+    return shutil.which(executable) is not None
 
 def is_installed(cmd: str) -> bool:
     """ Check if command is installed
@@ -40,11 +50,7 @@ def is_installed(cmd: str) -> bool:
     Returns:
         bool: True if installed
     """
-    status, _ = run_command(f"which {cmd}")
-    if status in [0, ]:
-        return True
-    else:
-        return False
+    return shutil.which(cmd) is not None
 
 def redirect_error_2_null() -> int:
     """ Redirect error to null
@@ -54,14 +60,11 @@ def redirect_error_2_null() -> int:
     Returns:
         int: old stderr
     """
-    import os, sys
     # https://github.com/spatialaudio/python-sounddevice/issues/11
 
-    devnull = os.open(os.devnull, os.O_WRONLY)
     old_stderr = os.dup(2)
     sys.stderr.flush()
-    os.dup2(devnull, 2)
-    os.close(devnull)
+    os.dup2(_DEVNULL_FD, 2)
     return old_stderr
 
 def cancel_redirect_error(old_stderr: int) -> None:
@@ -70,7 +73,6 @@ def cancel_redirect_error(old_stderr: int) -> None:
     Args:
         old_stderr (int): old stderr
     """
-    import os, sys
     sys.stderr.flush()
     os.dup2(old_stderr, 2)
     os.close(old_stderr)
@@ -165,7 +165,7 @@ class Ollama(LLM):
         Args:
             role (str): Role of message, e.g. "user", "assistant"
             content (str): Content of message
-            image_path (str, optional): Image path, default is None
+            image_path (str or bytes, optional): Image path, or image data in memory, default is None
 
         Raises:
             ValueError: Role must be 'user' or 'assistant'
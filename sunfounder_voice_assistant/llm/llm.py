@@ -42,6 +42,8 @@ class LLM():
 
         self.params = {}
         self.messages = []
+        # Keep-alive, so only the first request pays for the TCP/TLS handshake
+        self.session = requests.Session()
 
         if self.url is None and self.base_url is not None:
             self.url = self.base_url + "/chat/completions"
@@ -103,7 +105,7 @@ class LLM():
         Args:
             role (str): Role
             content (str): Content
-            image_path (str, optional): Image path, default is None
+            image_path (str or bytes, optional): Image path, or JPEG data in memory, default is None
         """
         if image_path is not None:
             # get base64 url from image
@@ -122,11 +124,13 @@ class LLM():
         """ Get base64 from image
 
         Args:
-            image_path (str): Image path
+            image_path (str or bytes): Image path, or image data in memory
 
         Returns:
             str: Base64 string
         """
+        if isinstance(image_path, (bytes, bytearray, memoryview)):
+            return base64.b64encode(image_path).decode("utf-8")
         with open(image_path, "rb") as image_file:
             encoded_string = base64.b64encode(image_file.read())
         return encoded_string.decode("utf-8")
@@ -135,12 +139,15 @@ class LLM():
         """ Get base64 url from image
 
         Args:
-            image_path (str): Image path
+            image_path (str or bytes): Image path, or JPEG data in memory
 
         Returns:
             str: Base64 url
         """
-        image_type = image_path.split(".")[-1]
+        if isinstance(image_path, (bytes, bytearray, memoryview)):
+            image_type = "jpeg"
+        else:
+            image_type = image_path.split(".")[-1]
         base64 = self.get_base64_from_image(image_path)
         return f"data:image/{image_type};base64,{base64}"
 
@@ -198,8 +205,10 @@ class LLM():
         self.debug(f"Chat with URL: {self.url}")
         self.debug(f"Chat with headers: {headers}")
         self.debug(f"Chat with data: {data}")
-        response = requests.post(self.url, headers=headers, data=json.dumps(data), stream=stream)
-        self.debug(f"Chat with response: {response.text}")
+        response = self.session.post(self.url, headers=headers, data=json.dumps(data), stream=stream)
+        # Reading .text of a stream waits for the whole response, log it only when not streaming
+        if self.debug_enabled and not stream:
+            self.debug(f"Chat with response: {response.text}")
         return response
 
     def prompt(self, msg, image_path=None, stream=False, **kwargs):
@@ -207,7 +216,7 @@ class LLM():
 
         Args:
             msg (str or list): Message
-            image_path (str, optional): Image path, default is None
+            image_path (str or bytes, optional): Image path, or JPEG data in memory, default is None
             stream (bool, optional): Stream, default is False
             **kwargs: Additional arguments
 
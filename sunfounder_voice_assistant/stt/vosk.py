@@ -1,5 +1,9 @@
+import hashlib
 import logging
+import mmap
 import queue
+import re
+import struct
 import wave
 import requests
 from urllib.request import urlopen
@@ -9,6 +13,7 @@ import threading  # 用于终止控制
 from vosk import Model, KaldiRecognizer, SetLogLevel
 from tqdm import tqdm
 from zipfile import ZipFile
+from concurrent.futures import ThreadPoolExecutor
 from .._utils import ignore_stderr
 from .vosk_models import DEFAULT_MODELS
 
@@ -30,6 +35,15 @@ class Vosk():
     """ Vosk STT class """
 
     DEFAULT_LANGUAGE = "en-us"
+    BLOCKSIZE = 4000
+    """ Frames per audio callback, same batch size the file path feeds to the recognizer """
+    LATENCY = "low"
+    """ Default input latency passed to PortAudio """
+    DOWNLOAD_CONNECTIONS = 4
+    """ Parallel connections for fresh model downloads, set 1 to disable """
+    RANGE_DOWNLOAD_MIN_SIZE = 8 * 1024 * 1024
+    """ Smallest file worth downloading in parallel ranges """
+
     def __init__(self, language=None, samplerate=None, device=None, log=None):
         """ Initialize Vosk STT
 
@@ -44,6 +58,7 @@ class Vosk():
             Path(MODEL_BASE_PATH).mkdir(parents=True)
 
         self.log = log or logging.getLogger(__name__)
+        self._model_list_lock = threading.Lock()
         self._load_model_list()
         SetLogLevel(-1)
         self.downloading = False
@@ -53,6 +68,12 @@ class Vosk():
         self.wake_word_thread = None
         self.waked = False
         self.wake_word_thread_started = False
+        self._on_wake = None
+        self._wake_word_stop = None
+
+        self._audio_queue = queue.SimpleQueue()
+        self._input_stream = None
+        self._input_stream_config = None
 
         self._device = device or sd.default.device
         if samplerate is None:
@@ -60,8 +81,11 @@ class Vosk():
             samplerate = int(device_info["default_samplerate"])
         self._samplerate = samplerate
         self.recognizer = None
+        self._words_set = None
+        self._partial_words_set = None
         self._language = None
         self.wake_words = None
+        self._wake_re = None
 
         if language is not None:
             self.set_language(language, init=False)
@@ -83,6 +107,18 @@ class Vosk():
         model_path = str(model_path)
         model = Model(model_path)
         self.recognizer = KaldiRecognizer(model, self._samplerate)
+        self._words_set = None
+        self._partial_words_set = None
+
+    def warmup(self):
+        """ Run 100 ms of silence through the recognizer and reset it
+
+        Keeps the recognizer's first-use setup off the first real listen.
+        """
+        if self.recognizer is None:
+            return
+        self.recognizer.AcceptWaveform(bytes(self._samplerate // 10 * 2))
+        self.recognizer.Reset()
 
     def _load_model_list(self):
         """Load model list from local cache or built-in defaults (offline, no network)."""
@@ -100,9 +136,32 @@ class Vosk():
         if not models:
             models = DEFAULT_MODELS.copy()
 
-        self.available_models = models
-        self.available_languages = [model["lang"] for model in self.available_models]
-        self.available_model_names = [model["name"] for model in self.available_models]
+        self._set_model_list(models)
+
+    def _set_model_list(self, models):
+        """ Replace the model list, together with its language and name lists
+
+        Args:
+            models (list): Model list entries
+        """
+        languages = [model["lang"] for model in models]
+        names = [model["name"] for model in models]
+        with self._model_list_lock:
+            self.available_models = models
+            self.available_languages = languages
+            self.available_model_names = names
+
+    def _get_model_info(self, lang: str) -> dict:
+        """ Get model list entry for language
+
+        Args:
+            lang (str): Language
+
+        Returns:
+            dict: Model list entry
+        """
+        with self._model_list_lock:
+            return self.available_models[self.available_languages.index(lang)]
 
     def update_model_list(self):
         """Fetch latest model list from network and save to cache.
@@ -142,9 +201,28 @@ class Vosk():
             self.log.warning("No local model list available, keeping current list")
 
         if models:
-            self.available_models = models
-            self.available_languages = [model["lang"] for model in self.available_models]
-            self.available_model_names = [model["name"] for model in self.available_models]
+            self._set_model_list(models)
+
+    def bootstrap(self, language: str, progress_callback=None):
+        """ Refresh the model list and download the model at the same time
+
+        First time setup needs both network fetches, so the model list is
+        updated in a thread while the model zip downloads, then the
+        recognizer is initialized. If the new list names a newer model for
+        the language, it is downloaded when initializing.
+
+        Args:
+            language (str): Language
+            progress_callback (function, optional): Progress callback function, default is None
+        """
+        list_thread = threading.Thread(name="model_list_thread", target=self.update_model_list, daemon=True)
+        list_thread.start()
+        try:
+            if language in self.available_languages:
+                self.download_model(language, progress_callback=progress_callback)
+        finally:
+            list_thread.join()
+        self.set_language(language)
 
     def wait_until_heard(self, wake_words=None, print_callback=lambda x: print(f"heard: \x1b[K{x}", end="\r", flush=True)):
         """ Wait until heard a wake word
@@ -157,53 +235,73 @@ class Vosk():
             str: Heard wake word
         """
         if wake_words is None:
-            wake_words = self.wake_words
-        if isinstance(wake_words, str):
-            wake_words = [wake_words]
+            wake_re = self._wake_re
+        else:
+            wake_re = self._compile_wake_words(wake_words)
         while True:
             result = self.listen(stream=False)
             print_callback(result)
             if result is None:
                 continue
-            if result.lower() in wake_words:
+            if wake_re is not None and wake_re.fullmatch(result.strip()):
                 break
         return result
 
-    def heard_wake_word(self, print_callback=lambda x: print(f"heard: \x1b[K{x}", end="\r", flush=True)):
+    def heard_wake_word(self, print_callback=lambda x: print(f"heard: \x1b[K{x}", end="\r", flush=True), stop=None):
         """ Check if heard a wake word
 
         Args:
             print_callback (function, optional): Print callback, default is None
+            stop (threading.Event, optional): Ends the listen when set, default is None
 
         Returns:
             bool: True if heard a wake word, False otherwise
         """
-        result = self.listen(stream=False)
+        result = self.listen(stream=False, stop=stop)
         if result is None:
             return False
         print_callback(result)
-        return result.lower() in self.wake_words
+        return self._wake_re is not None and self._wake_re.fullmatch(result.strip()) is not None
+
+    def wait_for_wake_word(self, stop=None):
+        """ Wait for wake word
 
-    def wait_for_wake_word(self):
-        """ Wait for wake word """
+        Args:
+            stop (threading.Event, optional): Ends the wait when set, only this
+                wait's own token, listen() never resets it, default is None
+        """
+        if stop is None:
+            stop = threading.Event()
         self.wake_word_thread_started = True
-        self.stop_listening_event.clear()
-        while self.wake_word_thread_started:
-            if self.stop_listening_event.is_set():
-                self.wake_word_thread_started = False
-                break
-            if self.heard_wake_word():
+        while self.wake_word_thread_started and not stop.is_set():
+            if self.heard_wake_word(stop=stop) and not stop.is_set():
                 print("")
                 self.waked = True
                 self.wake_word_thread_started = False
+                if self._on_wake is not None:
+                    self._on_wake()
                 break
-            time.sleep(0.1)
-        self.wake_word_thread = None
+            stop.wait(0.1)
+        # Don't clear the reference if a newer thread has replaced this one
+        if self.wake_word_thread is threading.current_thread():
+            self.wake_word_thread = None
+
+    def start_listening_wake_words(self, on_wake=None):
+        """ Start listening for wake words
 
-    def start_listening_wake_words(self):
-        """ Start listening for wake words """
+        A wake word thread still running is stopped first, so only one ever
+        reads the microphone.
+
+        Args:
+            on_wake (function, optional): Called from the wake word thread once waked, default is None
+        """
+        if self.wake_word_thread is not None:
+            self.stop_listening()
         self.waked = False
-        self.wake_word_thread = threading.Thread(name="wake_word_thread", target=self.wait_for_wake_word)
+        self._on_wake = on_wake
+        stop = threading.Event()
+        self._wake_word_stop = stop
+        self.wake_word_thread = threading.Thread(name="wake_word_thread", target=self.wait_for_wake_word, args=(stop,))
         self.wake_word_thread_started = True
         self.wake_word_thread.start()
 
@@ -229,86 +327,168 @@ class Vosk():
             if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getcomptype() != "NONE":
                 raise ValueError("Audio file must be WAV format mono PCM.")
 
-            self.recognizer.SetWords(True)
-            if stream:
-                self.recognizer.SetPartialWords(True)
-                return self.get_stream_result(wf, self.recognizer)
+        self._set_words(True, partial_words=stream)
+        if stream:
+            return self.get_stream_result(filename, self.recognizer)
+        else:
+            for data in self._read_pcm(filename):
+                self.recognizer.AcceptWaveform(data)
+            return self.recognizer.FinalResult()
+
+    def _set_words(self, words: bool, partial_words: bool):
+        """ Configure word level results, skipping calls that change nothing
+
+        Args:
+            words (bool): Include words in final results
+            partial_words (bool): Include words in partial results
+        """
+        if self._words_set != words:
+            self.recognizer.SetWords(words)
+            self._words_set = words
+        if self._partial_words_set != partial_words:
+            self.recognizer.SetPartialWords(partial_words)
+            self._partial_words_set = partial_words
+
+    def _read_pcm(self, filename, chunk_size=8000):
+        """ Read PCM data of a WAV file in chunks
+
+        The file is memory mapped and the ``data`` chunk is sliced directly,
+        so there is no wave module framing work per chunk.
+
+        Args:
+            filename (str): WAV file path
+            chunk_size (int, optional): Chunk size in bytes, default is 8000 (4000 frames)
+
+        Yields:
+            bytes: PCM data
+        """
+        with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Walk the RIFF chunks after the 12 byte header to find "data"
+            pos = 12
+            while pos + 8 <= len(mm):
+                chunk_id, chunk_len = struct.unpack_from("<4sI", mm, pos)
+                pos += 8
+                if chunk_id == b"data":
+                    break
+                pos += chunk_len + (chunk_len & 1)
             else:
-                self.recognizer.SetPartialWords(False)
-                return self.recognizer.Result()
+                return
+            end = min(pos + chunk_len, len(mm))
+            for start in range(pos, end, chunk_size):
+                yield mm[start:min(start + chunk_size, end)]
 
-    def get_stream_result(self, wf, recognizer):
+    def get_stream_result(self, filename, recognizer):
         """ Get streaming results from recognizer
 
         Args:
-            wf (wave.Wave_read): Wave file object
+            filename (str): WAV file path
             recognizer (KaldiRecognizer): Vosk recognizer
 
         Yields:
             str: STT result
         """
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
-            if self.recognizer.AcceptWaveform(data):
-                yield self.recognizer.Result()
+        for data in self._read_pcm(filename):
+            if recognizer.AcceptWaveform(data):
+                yield recognizer.Result()
             else:
-                yield self.recognizer.PartialResult()
+                yield recognizer.PartialResult()
 
-    def listen(self, stream=False, device=None, samplerate=None):
+    def listen(self, stream=False, device=None, samplerate=None, latency=None, stop=None):
         """ Listen from microphone and return results
 
         Args:
             stream (bool, optional): Stream mode, default is False
             device (int, optional): Device index, default is None
             samplerate (int, optional): Sampling rate, default is None
+            latency (str or float, optional): Input latency, "low", "high" or seconds, default is LATENCY
+            stop (threading.Event, optional): Ends the listen when set, not reset by listen, default is None
 
         Returns:
             str: STT result
         """
-        q = queue.Queue()
-        
-        def callback(indata, frames, time, status):
-            if status:
-                self.log.warning(status)
-            q.put(bytes(indata))
-
-        with ignore_stderr():
-            self.stop_listening_event.clear()
-            if stream:
-                return self._listen_streaming(q, device, samplerate, callback)
-            else:
-                return self._listen_non_streaming(q, device, samplerate, callback)
+        if latency is None:
+            latency = self.LATENCY
+
+        self.stop_listening_event.clear()
+        if stream:
+            return self._listen_streaming(device, samplerate, latency, stop)
+        else:
+            return self._listen_non_streaming(device, samplerate, latency, stop)
+
+    def _audio_callback(self, indata, frames, time, status):
+        """ Input stream callback, queue audio for the recognizer """
+        if status:
+            self.log.warning(status)
+        if self.stop_listening_event.is_set():
+            return
+        self._audio_queue.put(bytes(indata))
 
-    def _listen_streaming(self, q, device=None, samplerate=None, callback=None):
+    def _start_input_stream(self, device=None, samplerate=None, latency=LATENCY):
+        """ Start the microphone stream
+
+        The stream is opened once and kept between listens, it is only
+        reopened when device, samplerate or latency change.
+
+        Args:
+            device (int, optional): Device index, default is None
+            samplerate (int, optional): Sampling rate, default is None
+            latency (str or float, optional): Input latency, default is LATENCY
+        """
+        config = (device, samplerate, latency)
+        if self._input_stream is not None and self._input_stream_config != config:
+            self._close_input_stream()
+        if self._input_stream is None:
+            with ignore_stderr():
+                self._input_stream = sd.RawInputStream(
+                    samplerate=samplerate,
+                    blocksize=self.BLOCKSIZE,
+                    device=device,
+                    dtype="int16",
+                    channels=1,
+                    latency=latency,
+                    callback=self._audio_callback)
+            self._input_stream_config = config
+
+        # Drop audio left over from the last listen
+        while True:
+            try:
+                self._audio_queue.get_nowait()
+            except queue.Empty:
+                break
+        self._input_stream.start()
+
+    def _stop_input_stream(self):
+        """ Stop the microphone stream, keep it open for the next listen """
+        stream = self._input_stream
+        if stream is not None and not stream.closed and stream.active:
+            stream.stop()
+
+    def _close_input_stream(self):
+        """ Close the microphone stream """
+        stream = self._input_stream
+        self._input_stream = None
+        if stream is not None and not stream.closed:
+            stream.close()
+
+    def _listen_streaming(self, device=None, samplerate=None, latency=LATENCY, stop=None):
         """ Listen from microphone and return streaming results
 
         Args:
-            q (queue.Queue): Queue to store audio data
             device (int, optional): Device index, default is None
             samplerate (int, optional): Sampling rate, default is None
-            callback (function, optional): Callback function, default is None
+            latency (str or float, optional): Input latency, default is LATENCY
+            stop (threading.Event, optional): Ends the listen when set, default is None
 
         Yields:
             dict: STT result
         """
-        with sd.RawInputStream(
-            samplerate=samplerate,
-            blocksize=1024,
-            device=device,
-            dtype="int16",
-            channels=1,
-            callback=callback):
-
-            while True:
-                if self.stop_listening_event.is_set():
+        self._start_input_stream(device, samplerate, latency)
+        try:
+            while not self.stop_listening_event.is_set() and not (stop is not None and stop.is_set()):
+                # Blocks until audio arrives, stop_listening() wakes it with None
+                data = self._audio_queue.get()
+                if data is None:
                     return None
-            
-                try:
-                    data = q.get(timeout=0.5)
-                except queue.Empty:
-                    continue
                 result = {
                     "done": False,
                     "partial": "",
@@ -330,36 +510,36 @@ class Vosk():
                         continue
                     result["partial"] = partial.strip()
                     yield result
+        finally:
+            self._stop_input_stream()
 
-    def _listen_non_streaming(self, q, device=None, samplerate=None, callback=None):
+    def _listen_non_streaming(self, device=None, samplerate=None, latency=LATENCY, stop=None):
         """ Listen from microphone and return final result
 
         Args:
-            q (queue.Queue): Queue to store audio data
             device (int, optional): Device index, default is None
             samplerate (int, optional): Sampling rate, default is None
-            callback (function, optional): Callback function, default is None
+            latency (str or float, optional): Input latency, default is LATENCY
+            stop (threading.Event, optional): Ends the listen when set, default is None
 
         Returns:
             str: STT result
         """
-        with sd.RawInputStream(samplerate=samplerate, blocksize=1024, device=device,
-                                dtype="int16", channels=1, callback=callback):
-
-            while True:
-                if self.stop_listening_event.is_set():
+        self._start_input_stream(device, samplerate, latency)
+        try:
+            while not self.stop_listening_event.is_set() and not (stop is not None and stop.is_set()):
+                # Blocks until audio arrives, stop_listening() wakes it with None
+                data = self._audio_queue.get()
+                if data is None:
                     return None
-                
-                try:
-                    data = q.get(timeout=0.5)
-                except queue.Empty:
-                    continue
                 if self.recognizer.AcceptWaveform(data):
                     text = self.recognizer.Result()
                     text = json.loads(text)["text"]
                     if text == "":
                         continue
                     return text
+        finally:
+            self._stop_input_stream()
 
     def set_wake_words(self, wake_words: list):
         """ Set wake words
@@ -368,6 +548,23 @@ class Vosk():
             wake_words (list): List of wake words
         """
         self.wake_words = wake_words
+        self._wake_re = self._compile_wake_words(wake_words)
+
+    @staticmethod
+    def _compile_wake_words(wake_words):
+        """ Compile wake words into one case-insensitive pattern
+
+        Args:
+            wake_words (list or str): Wake words
+
+        Returns:
+            re.Pattern: Pattern to fullmatch a result against, None if no wake words
+        """
+        if not wake_words:
+            return None
+        if isinstance(wake_words, str):
+            wake_words = [wake_words]
+        return re.compile("|".join(re.escape(word.strip()) for word in wake_words), re.IGNORECASE)
 
     def language(self) -> str:
         """ Get current language
@@ -399,7 +596,7 @@ class Vosk():
         Returns:
             str: Model name
         """
-        return self.available_model_names[self.available_languages.index(lang)]
+        return self._get_model_info(lang)["name"]
 
     def get_model_path(self, lang: str) -> Path:
         """ Get model path for language
@@ -439,8 +636,9 @@ class Vosk():
             progress_callback (function, optional): Progress callback function, default is None
             max_retries (int, optional): Maximum retries, default is 5
         """
-        model_path = self.get_model_path(lang)
-        if self.is_model_downloaded(lang):
+        model_info = self._get_model_info(lang)
+        model_path = Path(MODEL_BASE_PATH, model_info["name"])
+        if model_path.exists():
             return
         
         if self.downloading:
@@ -450,6 +648,7 @@ class Vosk():
         self.stop_downloading_event.clear()  # 重置终止事件（确保每次下载前都是未触发状态）
         zip_url = MODEL_PRE_URL + f"{model_path.name}.zip"
         zip_path = f"{model_path}.zip"
+        expected_md5 = model_info.get("md5")
         retries = 0
         
         try:
@@ -459,71 +658,29 @@ class Vosk():
                     raise Exception("Download cancelled by user")
 
                 try:
-                    # Check for partially downloaded file
-                    resume_byte_pos = 0
-                    if os.path.exists(zip_path):
-                        resume_byte_pos = os.path.getsize(zip_path)
-                        self.log.info(f"Resuming download from byte position {resume_byte_pos}")
-
-                    headers = {}
-                    if resume_byte_pos > 0:
-                        headers['Range'] = f'bytes={resume_byte_pos}-'
-
-                    # Send request
-                    response = requests.get(zip_url, headers=headers, stream=True, timeout=30)
-                    
-                    # Check response status
-                    if response.status_code not in [200, 206]:  # 200: full response, 206: partial content
-                        response.raise_for_status()
-                    
-                    # Get total file size
-                    content_length = response.headers.get('content-length')
-                    if content_length is None:
-                        total_size = None
-                    else:
-                        total_size = int(content_length) + resume_byte_pos
-                    
-                    # Prepare progress display
-                    if progress_callback:
-                        progress_callback(resume_byte_pos, total_size)
+                    range_size = None
+                    if not os.path.exists(zip_path):
+                        range_size = self._get_range_download_size(zip_url)
+                    if range_size:
+                        total_size = range_size
+                        md5 = self._download_ranges(zip_url, zip_path, total_size, progress_callback)
                     else:
-                        t = tqdm(
-                            total=total_size, initial=resume_byte_pos,
-                            unit="B", unit_scale=True, unit_divisor=1024,
-                            desc=zip_url.rsplit("/", maxsplit=1)[-1]
-                        )
-
-                    # Write to file
-                    mode = 'ab' if resume_byte_pos > 0 else 'wb'
-                    with open(zip_path, mode) as f:
-                        downloaded_this_attempt = 0
-                        for chunk in response.iter_content(chunk_size=8192):
-                            # 每次写入前检查是否需要终止
-                            if self.stop_downloading_event.is_set():
-                                raise Exception("Download cancelled by user")
-                            
-                            if chunk:  # Filter out keep-alive empty chunks
-                                f.write(chunk)
-                                chunk_size = len(chunk)
-                                downloaded_this_attempt += chunk_size
-                                resume_byte_pos += chunk_size
-                                
-                                if progress_callback:
-                                    progress_callback(resume_byte_pos, total_size)
-                                else:
-                                    t.update(chunk_size)
-
-                    if not progress_callback:
-                        t.close()
-
-                    # Verify file size if possible
+                        total_size, md5 = self._download_resumable(zip_url, zip_path, progress_callback)
+
+                    # Verify file size if possible, an incomplete file is kept for resuming
                     if total_size is not None:
                         downloaded_size = os.path.getsize(zip_path)
                         if downloaded_size != total_size:
                             raise Exception(f"Download incomplete: received {downloaded_size} bytes, expected {total_size} bytes")
-                    else:
+                    elif not expected_md5:
                         self.log.warning("Cannot verify file integrity - server did not provide content length")
 
+                    # Verify checksum from the model list
+                    if expected_md5 and md5.hexdigest() != expected_md5:
+                        # Corrupt data can't be resumed, drop it so the retry starts clean
+                        os.remove(zip_path)
+                        raise Exception(f"Download corrupted: md5 {md5.hexdigest()} does not match {expected_md5}")
+
                     # Unzip and clean up
                     with ZipFile(zip_path, "r") as model_ref:
                         model_ref.extractall(model_path.parent)
@@ -557,6 +714,196 @@ class Vosk():
             self.downloading = False
             self.stop_downloading_event.clear()  # 重置终止事件
 
+    def _download_resumable(self, zip_url, zip_path, progress_callback=None):
+        """ Download over one connection, resuming a partial file if there is one
+
+        Args:
+            zip_url (str): URL
+            zip_path (str): Output file path
+            progress_callback (function, optional): Progress callback function, default is None
+
+        Returns:
+            tuple: total size (None if unknown), md5 hash object of the whole file
+        """
+        # Check for partially downloaded file
+        resume_byte_pos = 0
+        if os.path.exists(zip_path):
+            resume_byte_pos = os.path.getsize(zip_path)
+            self.log.info(f"Resuming download from byte position {resume_byte_pos}")
+
+        headers = {}
+        if resume_byte_pos > 0:
+            headers['Range'] = f'bytes={resume_byte_pos}-'
+
+        # Send request
+        response = requests.get(zip_url, headers=headers, stream=True, timeout=30)
+
+        # Check response status
+        if response.status_code not in [200, 206]:  # 200: full response, 206: partial content
+            response.raise_for_status()
+        if response.status_code == 200 and resume_byte_pos > 0:
+            # Server ignored the range request, start over
+            self.log.info("Server does not support resuming, restarting download")
+            resume_byte_pos = 0
+
+        # Hash while writing, so verifying needs no second read of the zip.
+        # A resumed download has to hash the part already on disk once.
+        md5 = hashlib.md5()
+        if resume_byte_pos > 0:
+            with open(zip_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    md5.update(chunk)
+
+        # Get total file size
+        content_length = response.headers.get('content-length')
+        if content_length is None:
+            total_size = None
+        else:
+            total_size = int(content_length) + resume_byte_pos
+
+        # Prepare progress display
+        if progress_callback:
+            progress_callback(resume_byte_pos, total_size)
+        else:
+            t = tqdm(
+                total=total_size, initial=resume_byte_pos,
+                unit="B", unit_scale=True, unit_divisor=1024,
+                desc=zip_url.rsplit("/", maxsplit=1)[-1]
+            )
+
+        # Write to file
+        mode = 'ab' if resume_byte_pos > 0 else 'wb'
+        with open(zip_path, mode) as f:
+            downloaded_this_attempt = 0
+            for chunk in response.iter_content(chunk_size=8192):
+                # 每次写入前检查是否需要终止
+                if self.stop_downloading_event.is_set():
+                    raise Exception("Download cancelled by user")
+
+                if chunk:  # Filter out keep-alive empty chunks
+                    f.write(chunk)
+                    md5.update(chunk)
+                    chunk_size = len(chunk)
+                    downloaded_this_attempt += chunk_size
+                    resume_byte_pos += chunk_size
+
+                    if progress_callback:
+                        progress_callback(resume_byte_pos, total_size)
+                    else:
+                        t.update(chunk_size)
+
+        if not progress_callback:
+            t.close()
+
+        return total_size, md5
+
+    def _get_range_download_size(self, url):
+        """ Get file size if it is worth downloading in parallel ranges
+
+        Args:
+            url (str): URL
+
+        Returns:
+            int: File size, None if the server doesn't support ranges or the file is small
+        """
+        if self.DOWNLOAD_CONNECTIONS <= 1:
+            return None
+        try:
+            response = requests.head(url, allow_redirects=True, timeout=10)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+        if response.headers.get("accept-ranges", "").lower() != "bytes":
+            return None
+        size = int(response.headers.get("content-length", 0))
+        if size < self.RANGE_DOWNLOAD_MIN_SIZE:
+            return None
+        return size
+
+    def _download_ranges(self, url, path, total_size, progress_callback=None):
+        """ Download in DOWNLOAD_CONNECTIONS parallel ranges
+
+        Each range is fetched on its own connection and written in place
+        into a preallocated file. A failed download is removed, because a
+        file with holes can't be resumed.
+
+        Args:
+            url (str): URL
+            path (str): Output file path
+            total_size (int): File size
+            progress_callback (function, optional): Progress callback function, default is None
+
+        Returns:
+            hashlib.md5: md5 hash object of the whole file
+        """
+        part_size = -(-total_size // self.DOWNLOAD_CONNECTIONS)
+        ranges = [(start, min(start + part_size, total_size) - 1) for start in range(0, total_size, part_size)]
+        abort = threading.Event()
+        lock = threading.Lock()
+        downloaded = [0]
+
+        if progress_callback:
+            progress_callback(0, total_size)
+        else:
+            t = tqdm(
+                total=total_size,
+                unit="B", unit_scale=True, unit_divisor=1024,
+                desc=url.rsplit("/", maxsplit=1)[-1]
+            )
+
+        def fetch(fd, start, end):
+            response = requests.get(url, headers={'Range': f'bytes={start}-{end}'}, stream=True, timeout=30)
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise Exception("Server ignored the range request")
+            offset = start
+            for chunk in response.iter_content(chunk_size=65536):
+                if self.stop_downloading_event.is_set():
+                    raise Exception("Download cancelled by user")
+                if abort.is_set():
+                    return
+                if chunk:
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                    with lock:
+                        downloaded[0] += len(chunk)
+                        current = downloaded[0]
+                    if progress_callback:
+                        progress_callback(current, total_size)
+                    else:
+                        t.update(len(chunk))
+            if offset != end + 1:
+                raise Exception(f"Download incomplete: range {start}-{end} stopped at {offset}")
+
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, total_size)
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [executor.submit(fetch, fd, start, end) for start, end in ranges]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    abort.set()
+                    raise
+        except BaseException:
+            os.close(fd)
+            fd = None
+            os.remove(path)
+            raise
+        finally:
+            if fd is not None:
+                os.close(fd)
+            if not progress_callback:
+                t.close()
+
+        # Ranges arrive out of order, so the checksum is taken once at the end
+        md5 = hashlib.md5()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                md5.update(chunk)
+        return md5
+
     def download_progress_hook(self, tqdm_bar=None, progress_callback=None):
         """ Download progress hook function
 
@@ -587,11 +934,20 @@ class Vosk():
         return update_to
 
     def stop_listening(self):
-        """ Stop listening for wake word """
+        """ Stop listening for wake word, and wait for the wake word thread to end """
         self.stop_listening_event.set()
+        # The thread's own token, a listen starting meanwhile can't undo it
+        if self._wake_word_stop is not None:
+            self._wake_word_stop.set()
+        # Wake up a listen blocked on the audio queue
+        self._audio_queue.put(None)
+        thread = self.wake_word_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
 
     def close(self):
         """ Close STT """
         self.wake_word_thread_started = False
         self.stop_downloading_event.set()
-        self.stop_listening_event.set()
+        self.stop_listening()
+        self._close_input_stream()
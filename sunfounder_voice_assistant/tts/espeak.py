@@ -1,4 +1,7 @@
-from .._utils import is_installed, run_command, check_executable
+import shutil
+import subprocess
+import threading
+
 from .._audio_player import AudioPlayer
 from .._base import _Base
 
@@ -14,7 +17,8 @@ class Espeak(_Base):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
 
-        if not is_installed("espeak"):
+        self._espeak_path = shutil.which(self.ESPEAK)
+        if self._espeak_path is None:
             raise Exception("TTS engine: espeak is not installed.")
         self._amp = 100
         self._speed = 175
@@ -22,6 +26,26 @@ class Espeak(_Base):
         self._pitch = 50
         self._lang = 'en-US'
 
+    def _command(self, words: str, *output: str) -> list:
+        """ Build espeak command line
+
+        Args:
+            words (str): Words to say
+            *output (str): Output arguments, like ``'-w', file_path`` or ``'--stdout'``
+
+        Returns:
+            list: espeak arguments
+        """
+        return [
+            self._espeak_path,
+            f'-a{self._amp}',
+            f'-s{self._speed}',
+            f'-g{self._gap}',
+            f'-p{self._pitch}',
+            words,
+            *output,
+        ]
+
     def tts(self, words: str, file_path: str) -> None:
         """ Text-to-speech with espeak
 
@@ -30,26 +54,50 @@ class Espeak(_Base):
             file_path (str): Path to save audio file
         """
         self.log.debug(f'espeak: [{words}]')
-        if not check_executable('espeak'):
-            self.log.debug('espeak is busy. Pass')
 
-        cmd = f'espeak -a{self._amp} -s{self._speed} -g{self._gap} -p{self._pitch} "{words}" -w {file_path}'
-        _, result = run_command(cmd)
-        if len(result) != 0:
-            raise Exception(f'tts-espeak:\n\t{result}')
+        cmd = self._command(words, '-w', file_path)
         self.log.debug(f'command: {cmd}')
+        # Run espeak directly, no shell, so quotes in words need no escaping
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise Exception(f'tts-espeak:\n\t{proc.stderr}')
 
     def say(self, words: str) -> None:
         """ Say words with espeak
 
+        Audio is piped from espeak's stdout straight into the player,
+        no temporary wav file is written.
+
         Args:
             words (str): Words to say
         """
-        file = './espeak.wav'
-        self.tts(words, file)
-        with AudioPlayer() as player:
-            player.play_file(file)
-        
+        self.log.debug(f'espeak: [{words}]')
+
+        cmd = self._command(words, '--stdout')
+        self.log.debug(f'command: {cmd}')
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # Drain stderr while playing, warnings filling its pipe would stall espeak
+        stderr = []
+        stderr_thread = threading.Thread(target=lambda: stderr.append(proc.stderr.read()), daemon=True)
+        stderr_thread.start()
+        play_error = None
+        try:
+            with AudioPlayer() as player:
+                player.play_file(proc.stdout)
+        except ValueError as e:
+            # espeak may fail before writing a wav header, check its status first
+            play_error = e
+        finally:
+            proc.stdout.close()
+            proc.wait()
+            stderr_thread.join()
+            proc.stderr.close()
+        error = b''.join(stderr).decode('utf-8', errors='replace')
+        if proc.returncode != 0:
+            raise Exception(f'tts-espeak:\n\t{error}')
+        if play_error is not None:
+            raise play_error
+
     def set_amp(self, amp: int) -> None:
         """ Set amplitude
 
@@ -1,10 +1,36 @@
+import asyncio
+import hashlib
+import os
+import queue
+import re
+import shutil
+import struct
+import threading
+import wave
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .._audio_player import AudioPlayer
 from .._base import _Base
 
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Optional, Union
 from enum import StrEnum
 
+# orjson encodes long input text several times faster, fall back to json
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    import json
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
 class OpenAI_TTS(_Base):
     """ OpenAI TTS engine.
     
@@ -13,6 +39,8 @@ class OpenAI_TTS(_Base):
         model (Model, optional): Model, default is Model.GPT_4O_MINI_TTS.
         api_key (str, optional): API key.
         gain (float, optional): Volume gain, default is 1.5.
+        cache (bool, optional): Whether to cache synthesized audio on disk, default is True.
+        audio_format (str, optional): Format of saved audio files, default is 'wav'. Playback always requests raw 'pcm'.
         log (logging.Logger, optional): Logger, default is None.
         *args: passed to :class:`sunfounder_voice_assistant._base._Base`.
         **kwargs: passed to :class:`sunfounder_voice_assistant._base._Base`.
@@ -22,6 +50,23 @@ class OpenAI_TTS(_Base):
 
     URL = "https://api.openai.com/v1/audio/speech"
     AUDIO_FORMAT = 'wav'
+    AUDIO_FORMATS = ['mp3', 'opus', 'aac', 'flac', 'wav', 'pcm']
+    PCM_SAMPLE_RATE = 24000
+    """ Sample rate of 'pcm' responses, 16 bit mono little endian """
+    CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sunfounder_tts")
+    CACHE_MAX_BYTES = 100 * 1024 * 1024
+    """ Least recently used audio is evicted above this size """
+    CHUNK_SIZE = 8192
+    """ Bytes read from the response per iteration, about 170 ms of PCM """
+    PREFETCH_WORKERS = 2
+    """ Concurrent background requests started by prefetch() """
+    TIMEOUT = (5, 30)
+    """ Connect and read timeouts in seconds """
+    SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+    BATCH_DELAY = 0.15
+    """ Seconds say_buffered() waits for more text before sending a request """
+    BATCH_MAX_CHARS = 200
+    """ Buffered text length that is sent right away """
     class Voice(StrEnum):
         """ Voice enum. """
 
@@ -41,6 +86,9 @@ class OpenAI_TTS(_Base):
 
         GPT_4O_MINI_TTS = "gpt-4o-mini-tts"
 
+    _VOICE_BY_STR = {v.value: v for v in Voice}
+    _MODEL_BY_STR = {m.value: m for m in Model}
+
     DEFAULT_MODEL = Model.GPT_4O_MINI_TTS
     DEFAULT_VOICE = Voice.ALLOY
 
@@ -49,83 +97,564 @@ class OpenAI_TTS(_Base):
         model: Model=DEFAULT_MODEL,
         api_key: str=None,
         gain: float=1.5,
+        audio_format: str=AUDIO_FORMAT,
+        cache: bool=True,
         **kwargs) -> None:
         super().__init__(*args, **kwargs)
 
-        self._model = model or self.DEFAULT_MODEL
-        self._voice = voice or self.DEFAULT_VOICE
+        if audio_format not in self.AUDIO_FORMATS:
+            raise ValueError(f"Invalid audio_format: {audio_format}, must be one of {self.AUDIO_FORMATS}")
+        self._audio_format = audio_format
+
+        self._model = self._coerce(model or self.DEFAULT_MODEL, self.Model, self._MODEL_BY_STR, "model")
+        self._voice = self._coerce(voice or self.DEFAULT_VOICE, self.Voice, self._VOICE_BY_STR, "voice")
         self._gain = gain
+        self._cache = cache
         self.is_ready = False
+        self._update_body_template()
+
+        # Keep-alive session, repeated requests reuse the TLS connection
+        self._session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            # POST is retried only where the server can't have produced the
+            # speech: connect errors and 429/5xx. A read error may come after
+            # a billed success, so it is not retried
+            allowed_methods=None,
+            read=0,
+            other=0,
+        )
+        # One connection per prefetch worker plus one for the sentence playing now
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.PREFETCH_WORKERS + 1, max_retries=retry)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"Content-Type": "application/json"})
+
+        # Background requests for upcoming sentences
+        self._executor = ThreadPoolExecutor(max_workers=self.PREFETCH_WORKERS)
+        self._prefetched = {}
+        self._prefetch_lock = threading.Lock()
+
+        # Short pieces from say_buffered(), sent together by flush()
+        self._pending = []
+        self._pending_chars = 0
+        self._pending_instructions = None
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+        self._say_lock = threading.Lock()
+
+        # Output stream is opened on first playback and kept across utterances
+        self._player = None
+        self._player_lock = threading.Lock()
 
         if api_key:
             self.set_api_key(api_key)
 
-    def tts(self, words: str, output_file: str=f"./openai_tts.{AUDIO_FORMAT}", instructions: Optional[str]=None, stream: bool=False) -> bool:
-        """ Request OpenAI TTS API.
+    def _update_body_template(self) -> None:
+        """ Rebuild the request body fields that only change with voice and model. """
+        self._body_template = {
+            "model": self._model.value,
+            "voice": self._voice.value,
+        }
+
+    def _post(self, words: str, instructions: Optional[str]=None, response_format: str='pcm') -> requests.Response:
+        """ Send a speech request, the body is left unread for streaming.
 
         Args:
             words (str): Words to say.
-            output_file (str, optional): Output file, default is './openai_tts.wav'.
             instructions (str, optional): Instructions, default is None.
-            stream (bool, optional): Whether to stream the audio, default is False.
+            response_format (str, optional): Audio format to request, default is 'pcm'.
 
         Returns:
-            bool: True if success, False otherwise.
+            requests.Response: Response with the audio body.
         """
-        
-        headers = {
-            "Authorization": f"Bearer {self._api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": self._model.value,
-            "input": words,
-            "voice": self._voice.value,
-            "response_format": self.AUDIO_FORMAT,
-        }
-        
+        data = {**self._body_template, "input": words, "response_format": response_format}
+
         if instructions:
             data["instructions"] = instructions
-        
+
+        # Content-Type is set on the session
+        response = self._session.post(self.URL, data=_dumps(data), stream=True, timeout=self.TIMEOUT)
+        response.raise_for_status()
+        return response
+
+    def tts(self, words: str, output_file: Optional[str]=None, instructions: Optional[str]=None, stream: bool=False) -> bool:
+        """ Request OpenAI TTS API.
+
+        Audio is handled chunk by chunk as it arrives, written to the output
+        file and/or played at the same time. Playback requests raw 24 kHz
+        PCM, so the player starts without parsing a container. Saving while
+        streaming is only possible for 'wav' and 'pcm' audio formats.
+
+        Args:
+            words (str): Words to say.
+            output_file (str, optional): Output file, default is './openai_tts.<audio_format>' when not streaming, and none when streaming.
+            instructions (str, optional): Instructions, default is None.
+            stream (bool, optional): Whether to play the audio while it downloads, default is False.
+
+        Returns:
+            bool: True if success, False otherwise.
+        """
+        if stream:
+            response_format = 'pcm'
+            if output_file and self._audio_format not in ('wav', 'pcm'):
+                raise ValueError(f"Cannot save {self._audio_format} while streaming, use 'wav' or 'pcm'")
+        else:
+            response_format = self._audio_format
+            if output_file is None:
+                output_file = f"./openai_tts.{self._audio_format}"
+
+        cache_from_file = False
         try:
-            response = requests.post(self.URL, json=data, headers=headers, stream=stream)
-            response.raise_for_status()
-                
-            if stream:
-                with AudioPlayer(gain=self._gain) as player:
-                    for chunk in response.iter_content(chunk_size=1024):
-                        if chunk:
-                            player.play(chunk)
-            else:
-                content = response.content
-                with open(output_file, "wb") as f:
-                    f.write(content)
-                
+            with ExitStack() as stack:
+                audio = self._cache_load(words, instructions, response_format)
+                if audio is not None:
+                    chunks = [audio]
+                else:
+                    response = stack.enter_context(self._post(words, instructions, response_format))
+                    chunks = self._cache_tee(
+                        response.iter_content(chunk_size=self.CHUNK_SIZE),
+                        words, instructions, response_format)
+                write = None
+                if output_file and response_format == 'pcm' and self._audio_format == 'wav':
+                    wf = stack.enter_context(wave.open(output_file, "wb"))
+                    wf.setnchannels(1)
+                    wf.setsampwidth(2)
+                    wf.setframerate(self.PCM_SAMPLE_RATE)
+                    write = wf.writeframesraw
+                elif output_file:
+                    f = stack.enter_context(open(output_file, "wb"))
+                    write = f.write
+                if stream:
+                    stack.enter_context(self._player_lock)
+                    chunks = self._strip_wav_header(chunks)
+                    self._stream_audio(chunks, self._get_player(), write)
+                elif audio is not None:
+                    write(audio)
+                else:
+                    # File only, copy the body in large reads without a per-chunk Python loop
+                    response.raw.decode_content = True
+                    shutil.copyfileobj(response.raw, f, 65536)
+                    cache_from_file = True
+
+            if cache_from_file:
+                self._cache_save(output_file, words, instructions, response_format)
             return True
-        
-        except requests.exceptions.RequestException as e:
+
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
             self.log.error(f"OpenAI TTS API request error: {e}")
             return False
+        except ValueError as e:
+            self.log.error(f"OpenAI TTS API response error: {e}")
+            return False
         except IOError as e:
             self.log.error(f"OpenAI TTS API file operation error: {e}")
             return False
 
+    def _strip_wav_header(self, chunks):
+        """ Yield PCM from audio chunks, dropping a RIFF/WAVE header if there is one.
+
+        Some OpenAI compatible servers answer with wav even when pcm is
+        requested. The header is parsed once, checked against the PCM format
+        the player is opened with, and everything after it passes through
+        untouched.
+
+        Args:
+            chunks (iterable): Audio chunks.
+
+        Yields:
+            bytes: PCM chunks.
+
+        Raises:
+            ValueError: If the wav header is truncated or the format doesn't match.
+        """
+        chunks = iter(chunks)
+        head = bytearray()
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= 12:
+                break
+        if head[:4] != b'RIFF' or head[8:12] != b'WAVE':
+            if head:
+                yield bytes(head)
+            yield from chunks
+            return
+
+        def need(size):
+            while len(head) < size:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    raise ValueError("Truncated WAV header")
+                head.extend(chunk)
+
+        offset = 12
+        while True:
+            need(offset + 8)
+            chunk_id, size = struct.unpack_from('<4sI', head, offset)
+            if chunk_id == b'data':
+                break  # Size is often 0xFFFFFFFF for streamed wav, read to the end
+            if chunk_id == b'fmt ':
+                need(offset + 24)
+                _, channels, rate, _, _, bits = struct.unpack_from('<HHIIHH', head, offset + 8)
+                if (channels, rate, bits) != (1, self.PCM_SAMPLE_RATE, 16):
+                    raise ValueError(f"Unexpected WAV format: {channels} channels, {rate} Hz, {bits} bit")
+            offset += 8 + size + (size & 1)
+
+        data = bytes(head[offset + 8:])
+        if data:
+            yield data
+        yield from chunks
+
+    def _stream_audio(self, chunks, player: AudioPlayer, write=None) -> None:
+        """ Play audio chunks while they download.
+
+        A writer thread feeds the player from a bounded queue, so reading
+        the network goes on while the sound card blocks on a write.
+
+        Args:
+            chunks (iterable): PCM audio chunks, usually from a streaming response.
+            player (AudioPlayer): Opened player.
+            write (function, optional): Also called with every chunk, default is None.
+        """
+        q = queue.Queue(maxsize=8)
+        errors = []
+
+        def writer():
+            while True:
+                chunk = q.get()
+                if chunk is None:
+                    break
+                if errors:
+                    continue  # Keep draining so the reader never blocks
+                try:
+                    player.play(chunk)
+                except Exception as e:
+                    errors.append(e)
+            if not errors:
+                try:
+                    player.flush_buffer()
+                except Exception as e:
+                    errors.append(e)
+
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if write:
+                    write(chunk)
+                q.put(chunk)
+                if errors:
+                    break
+        finally:
+            # Always end the writer, also when reading the chunks failed,
+            # or it would wait on get() forever
+            q.put(None)
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    async def atts(self, words: str, output_file: Optional[str]=None, instructions: Optional[str]=None, stream: bool=False) -> bool:
+        """ Request OpenAI TTS API without blocking the event loop.
+
+        The request runs in a worker thread on the shared session, so the
+        caller's loop keeps running during the round trip and file write.
+        Arguments are the same as :meth:`tts`.
+
+        Returns:
+            bool: True if success, False otherwise.
+        """
+        return await asyncio.to_thread(self.tts, words, output_file=output_file, instructions=instructions, stream=stream)
+
+    def _fetch_pcm(self, words: str, instructions: Optional[str]=None) -> bytes:
+        """ Download the whole utterance as raw PCM.
+
+        Args:
+            words (str): Words to say.
+            instructions (str, optional): Instructions, default is None.
+
+        Returns:
+            bytes: 24 kHz 16 bit mono PCM.
+        """
+        audio = self._cache_load(words, instructions, 'pcm')
+        if audio is None:
+            with self._post(words, instructions) as response:
+                audio = b"".join(self._strip_wav_header([response.content]))
+            self._cache_save(audio, words, instructions, 'pcm')
+        return audio
+
+    def _cache_path(self, words: str, instructions: Optional[str], response_format: str) -> str:
+        """ Get the cache file path of an utterance.
+
+        Gain is not part of the key, it is applied at playback.
+
+        Args:
+            words (str): Words to say.
+            instructions (str): Instructions.
+            response_format (str): Audio format.
+
+        Returns:
+            str: Cache file path.
+        """
+        key = f"{words}|{self._voice.value}|{self._model.value}|{instructions}"
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.CACHE_DIR, f"{digest}.{response_format}")
+
+    def _cache_load(self, words: str, instructions: Optional[str], response_format: str) -> Optional[bytes]:
+        """ Load cached audio.
+
+        Args:
+            words (str): Words to say.
+            instructions (str): Instructions.
+            response_format (str): Audio format.
+
+        Returns:
+            bytes: Audio, None if not cached.
+        """
+        if not self._cache:
+            return None
+        path = self._cache_path(words, instructions, response_format)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            return None
+        self.log.debug(f"OpenAI TTS cache hit: {path}")
+        return audio
+
+    def _cache_save(self, audio: Union[bytes, str], words: str, instructions: Optional[str], response_format: str) -> None:
+        """ Save audio to the cache and evict the oldest files above CACHE_MAX_BYTES.
+
+        Args:
+            audio (bytes | str): Audio, or path of a file holding it.
+            words (str): Words to say.
+            instructions (str): Instructions.
+            response_format (str): Audio format.
+        """
+        if not self._cache:
+            return
+        path = self._cache_path(words, instructions, response_format)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+            if isinstance(audio, str):
+                shutil.copyfile(audio, tmp_path)
+            else:
+                with open(tmp_path, "wb") as f:
+                    f.write(audio)
+            os.replace(tmp_path, path)
+
+            entries = []
+            for entry in os.scandir(self.CACHE_DIR):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, old_path in sorted(entries):
+                if total <= self.CACHE_MAX_BYTES:
+                    break
+                os.remove(old_path)
+                total -= size
+        except OSError as e:
+            self.log.warning(f"OpenAI TTS cache write failed: {e}")
+
+    def _cache_tee(self, chunks, words: str, instructions: Optional[str], response_format: str):
+        """ Yield chunks and cache the audio once all of it went through.
+
+        Args:
+            chunks (iterable): Audio chunks.
+            words (str): Words to say.
+            instructions (str): Instructions.
+            response_format (str): Audio format.
+
+        Yields:
+            bytes: Audio chunks.
+        """
+        if not self._cache:
+            yield from chunks
+            return
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self._cache_save(b"".join(parts), words, instructions, response_format)
+
+    def _play_pcm(self, audio: bytes) -> None:
+        """ Play raw PCM from memory.
+
+        Args:
+            audio (bytes): 24 kHz 16 bit mono PCM.
+        """
+        with self._player_lock:
+            player = self._get_player()
+            player.play(audio)
+            player.flush_buffer()
+
+    def _get_player(self) -> AudioPlayer:
+        """ Get the shared player, opening it on first use.
+
+        Reusing one PyAudio instance and stream saves the PortAudio setup
+        and the click of reopening the device on every utterance.
+
+        Returns:
+            AudioPlayer: Opened player for 24 kHz PCM.
+        """
+        if self._player is None:
+            self._player = AudioPlayer(sample_rate=self.PCM_SAMPLE_RATE, gain=self._gain)
+            self._player.open()
+        return self._player
+
+    def prefetch(self, words: str, instructions: Optional[str]=None) -> Future:
+        """ Start synthesizing words in the background.
+
+        A later :meth:`say` with the same words plays the prefetched audio
+        instead of sending a new request.
+
+        Args:
+            words (str): Words to say.
+            instructions (str, optional): Instructions, default is None.
+
+        Returns:
+            Future: Future of the PCM audio bytes.
+        """
+        key = (words, instructions, self._voice, self._model)
+        with self._prefetch_lock:
+            future = self._prefetched.get(key)
+            if future is None:
+                future = self._executor.submit(self._fetch_pcm, words, instructions)
+                self._prefetched[key] = future
+        return future
+
     def say(self, words: str, instructions: Optional[str]=None, stream: bool=True) -> None:
         """ Say words.
 
+        Multiple sentences are requested one by one, the next sentence is
+        prefetched while the current one plays.
+
         Args:
             words (str): Words to say.
             instructions (str, optional): Instructions, default is None.
             stream (bool, optional): Whether to stream the audio, default is True.
         """
-        if stream:
+        sentences = [sentence for sentence in self.SENTENCE_SPLIT_RE.split(words.strip()) if sentence]
+        for i, sentence in enumerate(sentences):
+            if i + 1 < len(sentences):
+                self.prefetch(sentences[i + 1], instructions)
+            self._say_sentence(sentence, instructions, stream)
+
+    def say_buffered(self, words: str, instructions: Optional[str]=None) -> None:
+        """ Say words, batched with other short pieces into one request.
+
+        Text is sent after BATCH_DELAY seconds without new words, or once
+        BATCH_MAX_CHARS are buffered. Use :meth:`say` when the words must
+        play right away.
+
+        Args:
+            words (str): Words to say.
+            instructions (str, optional): Instructions, default is None.
+        """
+        old_words = None
+        with self._pending_lock:
+            if self._pending and instructions != self._pending_instructions:
+                # Instructions changed, the old batch goes out on its own
+                old_words, old_instructions = self._take_pending()
+            self._pending.append(words)
+            self._pending_chars += len(words)
+            self._pending_instructions = instructions
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            full = self._pending_chars >= self.BATCH_MAX_CHARS
+            if not full:
+                self._flush_timer = threading.Timer(self.BATCH_DELAY, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+        if old_words:
+            with self._say_lock:
+                self.say(old_words, instructions=old_instructions)
+        if full:
+            self.flush()
+
+    def _take_pending(self) -> tuple:
+        """ Empty the buffer of :meth:`say_buffered`, call with _pending_lock held.
+
+        Returns:
+            tuple: Buffered words joined into one string, and their instructions.
+        """
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        words = " ".join(self._pending)
+        instructions = self._pending_instructions
+        self._pending = []
+        self._pending_chars = 0
+        return words, instructions
+
+    def flush(self) -> None:
+        """ Say the words buffered by :meth:`say_buffered` now. """
+        with self._pending_lock:
+            words, instructions = self._take_pending()
+
+        if words:
+            with self._say_lock:
+                self.say(words, instructions=instructions)
+
+    def _say_sentence(self, words: str, instructions: Optional[str]=None, stream: bool=True) -> None:
+        """ Say one sentence, from the prefetched audio if there is one.
+
+        Args:
+            words (str): Words to say.
+            instructions (str, optional): Instructions, default is None.
+            stream (bool, optional): Whether to stream the audio, default is True.
+        """
+        key = (words, instructions, self._voice, self._model)
+        with self._prefetch_lock:
+            future = self._prefetched.pop(key, None)
+
+        if future is None and stream:
             self.tts(words, instructions=instructions, stream=True)
-        else:
-            file_name = f"./openai_tts.{self.AUDIO_FORMAT}"
-            self.tts(words, instructions=instructions, output_file=file_name, stream=False)
-            with AudioPlayer(gain=self._gain) as player:
-                player.play_file(file_name)
+            return
+
+        # Play from memory, no round trip through a file on disk
+        try:
+            if future is not None:
+                audio = future.result()
+            else:
+                audio = self._fetch_pcm(words, instructions)
+        except requests.exceptions.RequestException as e:
+            self.log.error(f"OpenAI TTS API request error: {e}")
+            return
+        except ValueError as e:
+            self.log.error(f"OpenAI TTS API response error: {e}")
+            return
+        self._play_pcm(audio)
+
+    @staticmethod
+    def _coerce(value, enum: type, by_str: dict, name: str) -> StrEnum:
+        """ Convert a string or enum member to a member of enum.
+
+        A single dict lookup, members hash like their string values.
+
+        Args:
+            value (str | StrEnum): Value to convert.
+            enum (type): Target StrEnum class.
+            by_str (dict): Members of enum by value.
+            name (str): Name of the setting, for the error message.
+
+        Returns:
+            StrEnum: Enum member.
+
+        Raises:
+            ValueError: If value is not a member of enum.
+        """
+        member = by_str.get(value)
+        if member is None:
+            raise ValueError(f"Invalid {name}: {value}, must be one of {list(by_str)}")
+        return member
 
     def set_voice(self, voice: [Voice, str]) -> None:
         """ Set voice.
@@ -133,12 +662,8 @@ class OpenAI_TTS(_Base):
         Args:
             voice (Voice | str): Voice.
         """
-        if isinstance(voice, str):
-            voice = self.Voice(voice)
-        elif not isinstance(voice, self.Voice):
-            raise ValueError(f"Invalid voice: {voice}, must be {self.Voice.__name__}")
-        
-        self._voice = voice
+        self._voice = self._coerce(voice, self.Voice, self._VOICE_BY_STR, "voice")
+        self._update_body_template()
 
     def set_model(self, model: [Model, str]) -> None:
         """ Set model.
@@ -146,11 +671,8 @@ class OpenAI_TTS(_Base):
         Args:
             model (Model | str): Model.
         """
-        if isinstance(model, str):
-            model = self.Model(model)
-        elif not isinstance(model, self.Model):
-            raise ValueError(f"Invalid model: {model}, must be {self.Model.__name__}")
-        self._model = model
+        self._model = self._coerce(model, self.Model, self._MODEL_BY_STR, "model")
+        self._update_body_template()
 
     def set_api_key(self, api_key: str) -> None:
         """ Set api key.
@@ -161,6 +683,7 @@ class OpenAI_TTS(_Base):
         if not isinstance(api_key, str):
             raise ValueError(f"Invalid api_key: {api_key}, must be str")
         self._api_key = api_key
+        self._session.headers.update({"Authorization": f"Bearer {api_key}"})
 
     def set_gain(self, gain: float) -> None:
         """ Set gain.
@@ -171,3 +694,23 @@ class OpenAI_TTS(_Base):
         if not isinstance(gain, float):
             raise ValueError(f"Invalid gain: {gain}, must be float")
         self._gain = gain
+        if self._player is not None:
+            self._player.set_gain(gain)
+
+    def close(self) -> None:
+        """ Cancel pending prefetches, close the audio output and the HTTP session. """
+        with self._pending_lock:
+            self._take_pending()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._prefetch_lock:
+            self._prefetched.clear()
+        if self._player is not None:
+            self._player.close()
+            self._player = None
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,4 +1,9 @@
-from .._utils import is_installed, run_command, check_executable
+import os
+import shutil
+import subprocess
+import tempfile
+
+from .._audio_player import AudioPlayer
 from .._base import _Base
 
 class Pico2Wave(_Base):
@@ -6,6 +11,7 @@ class Pico2Wave(_Base):
     
     Args:
         lang (str, optional): language, leave it None to use default language, defaults to 'en-US'
+        gain (float, optional): playback volume gain, defaults to 1.0
         *args: passed to :class:`sunfounder_voice_assistant._base._Base`.
         **kwargs: passed to :class:`sunfounder_voice_assistant._base._Base`.
     """
@@ -19,30 +25,40 @@ class Pico2Wave(_Base):
         'it-IT',
     ]
     """Supported languages."""
+    _SUPPORTED_LANGUAGE_SET = frozenset(SUPPORTED_LANGUAUE)
+    PICO2WAVE = 'pico2wave'
 
-    def __init__(self, *args, lang: str=None, **kwargs) -> None:
+    def __init__(self, *args, lang: str=None, gain: float=1.0, **kwargs) -> None:
         super().__init__(*args, **kwargs)
 
-        if not is_installed("pico2wave"):
+        self._pico2wave_path = shutil.which(self.PICO2WAVE)
+        if self._pico2wave_path is None:
             raise Exception("TTS engine: pico2wave is not installed.")
         
         self._lang = lang or 'en-US'
+        self._gain = gain
 
     def say(self, words: str) -> None:
         """ Say words with pico2wave.
 
+        pico2wave renders to a temporary wav file, which is played in
+        process. Blocks until playback finishes.
+
         Args:
             words (str): words to say.
         """
         self.log.debug(f'pico2wave: [{words}]')
-        if not check_executable('pico2wave'):
-            self.log.debug('pico2wave is busy. Pass')
 
-        cmd = f'pico2wave -l {self._lang} -w ./pico2wave.wav "{words}" && aplay ./pico2wave.wav 2>/dev/null & '
-        _, result = run_command(cmd)
-        if len(result) != 0:
-            raise Exception(f'tts-pico2wave:\n\t{result}')
-        self.log.debug(f'command: {cmd}')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'pico2wave.wav')
+            cmd = [self._pico2wave_path, '-l', self._lang, '-w', file_path, words]
+            self.log.debug(f'command: {cmd}')
+            # Run pico2wave directly, no shell, so quotes in words need no escaping
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise Exception(f'tts-pico2wave:\n\t{proc.stderr}')
+            with AudioPlayer(gain=self._gain) as player:
+                player.play_file(file_path)
 
     def set_lang(self, lang: str) -> None:
         """ Set language.
@@ -50,6 +66,6 @@ class Pico2Wave(_Base):
         Args:
             lang (str): language.
         """
-        if lang not in self.SUPPORTED_LANGUAUE:
+        if lang not in self._SUPPORTED_LANGUAGE_SET:
             raise ValueError(f'Language {lang} is not supported')
         self._lang = lang
@@ -1,15 +1,41 @@
+import functools
+import gzip
 import json
+import logging
 import os
+import queue
+import re
+import threading
 import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, List
-from urllib.error import URLError
-from urllib.request import urlopen
+from typing import Callable, List, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+import onnxruntime
 from piper import PiperVoice
+from piper.config import PiperConfig
 from piper.download_voices import _needs_download, VOICE_PATTERN, URL_FORMAT
 from onnxruntime.capi.onnxruntime_pybind11_state import InvalidProtobuf
 from tqdm import tqdm
 
+# httpx is optional, it keeps one connection for both files of a voice
+_httpx_available = False
+try:
+    import httpx
+    _httpx_available = True
+except ImportError:
+    pass
+
+# zstandard is optional, without it only gzip is offered to the server
+_zstd_available = False
+try:
+    import zstandard
+    _zstd_available = True
+except ImportError:
+    pass
+
 from .piper_models import PIPER_MODELS as _DEFAULT_PIPER_MODELS, MODELS as _DEFAULT_MODELS, COUNTRYS as _DEFAULT_COUNTRYS
 from .._audio_player import AudioPlayer
 from .._base import _Base
@@ -18,6 +44,81 @@ HOME = os.path.expanduser("~")
 PIPER_MODEL_DIR = f"{HOME}/.piper_models"
 VOICES_JSON_URL = "https://huggingface.co/rhasspy/piper-voices/resolve/main/voices.json?download=true"
 PIPER_MODEL_LIST_CACHE_PATH = Path(PIPER_MODEL_DIR, "voices.json")
+_HTTP_CLIENT = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+_ACCEPT_ENCODING = "gzip, zstd" if _zstd_available else "gzip"
+
+_ZH_PUNCT_MAP = {
+    '，': '. ',
+    '。': '. ',
+    '！': '! ',
+    '？': '? ',
+    '——': '. ',
+    '“': '"',
+    '”': '"',
+    '‘': "'",
+    '’': "'",
+    "~": ". ",
+    "～": ". ",
+    "：": ". ",
+    "...": ". ",
+    "……": ". ",
+    "、": ". ",
+}
+# Longest first, so multi-character keys like "..." match as a whole
+_ZH_PUNCT_RE = re.compile("|".join(re.escape(k) for k in sorted(_ZH_PUNCT_MAP, key=len, reverse=True)))
+_ZH_NUM_DOT_RE = re.compile(r'(\d)\.(\d)')
+# Any character either substitution above could touch, "." covers "..." and 1.5
+_ZH_PUNCT_PRECHECK_RE = re.compile("[" + re.escape("".join(sorted({k[0] for k in _ZH_PUNCT_MAP} | {"."}))) + "]")
+
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?。！？])\s+')
+# Sentences shorter than this are fused with the previous one, a lone
+# "Ok." synthesized on its own comes out with odd prosody
+_MIN_SENTENCE_CHARS = 8
+
+# Fastest first, only those this onnxruntime build has are used
+_PREFERRED_PROVIDERS = (
+    "CUDAExecutionProvider",
+    "CoreMLExecutionProvider",
+    "ACLExecutionProvider",  # Arm Compute Library
+    "CPUExecutionProvider",
+)
+
+def _session_options() -> onnxruntime.SessionOptions:
+    """Session options for synthesis on small multi-core CPUs.
+
+    One core is left for audio playback and the rest of the assistant, and
+    idle threads sleep instead of spinning to save power.
+    """
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = max(1, (os.cpu_count() or 1) - 1)
+    options.inter_op_num_threads = 1
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return options
+
+def _session_providers() -> List[str]:
+    """Execution providers available in this onnxruntime, fastest first."""
+    available = set(onnxruntime.get_available_providers())
+    return [provider for provider in _PREFERRED_PROVIDERS if provider in available]
+
+def _split_sentences(text: str) -> List[str]:
+    """ Split text on sentence boundaries, fusing very short sentences.
+
+    Args:
+        text (str): text
+
+    Returns:
+        list: sentences
+    """
+    sentences = []
+    for sentence in _SENT_SPLIT_RE.split(text.strip()):
+        if sentences and len(sentence) < _MIN_SENTENCE_CHARS:
+            sentences[-1] += " " + sentence
+        else:
+            sentences.append(sentence)
+    return sentences
 
 def _parse_voices_json(voices_dict: dict) -> dict:
     """Parse HuggingFace voices.json format into PIPER_MODELS format.
@@ -45,21 +146,40 @@ class Piper(_Base):
     
     Args:
         model (str, optional): model, leave it None to use default model, defaults to None
+        quantize (bool, optional): run an INT8 copy of the model, made once on first load, defaults to False
+        mmap_weights (bool, optional): keep weights in an external data file that is memory mapped instead of read onto the heap, defaults to False
+        secondary_model (str, optional): model to load in the background after set_model, for switching to it instantly, defaults to None
         *args: passed to :class:`sunfounder_voice_assistant._base._Base`.
         **kwargs: passed to :class:`sunfounder_voice_assistant._base._Base`.
     """
 
-    def __init__(self, *args, model: str = None, **kwargs) -> None:
+    MAX_CACHED_VOICES = 2
+    """ Loaded voices kept in memory for switching back without reloading """
+    _voice_cache = OrderedDict()
+    _voice_cache_lock = threading.Lock()
+    _voice_load_locks = {}
+
+    def __init__(self, *args,
+                 model: str = None,
+                 quantize: bool = False,
+                 mmap_weights: bool = False,
+                 secondary_model: str = None,
+                 **kwargs) -> None:
         super().__init__(*args, **kwargs)
+        self._quantize = quantize
+        self._mmap_weights = mmap_weights
+        self.secondary_model = secondary_model
         # Init model directory
         if not os.path.exists(PIPER_MODEL_DIR):
             os.makedirs(PIPER_MODEL_DIR, 0o777)
             os.chown(PIPER_MODEL_DIR, 1000, 1000)
-        self._models = list(_DEFAULT_MODELS)
-        self._piper_models = {k: dict(v) for k, v in _DEFAULT_PIPER_MODELS.items()}
-        self._countrys = list(_DEFAULT_COUNTRYS)
+        self._set_model_list({k: dict(v) for k, v in _DEFAULT_PIPER_MODELS.items()}, _DEFAULT_MODELS)
         self._load_model_list()
         self.model = None
+        self._language = None
+        self._downloaded_cache = None
+        self._stop_event = threading.Event()
+        self._player = None
         if model is not None:
             self.set_model(model)
         else:
@@ -84,11 +204,21 @@ class Piper(_Base):
 
         if not models:
             piper_models = {k: dict(v) for k, v in _DEFAULT_PIPER_MODELS.items()}
-            models = list(_DEFAULT_MODELS)
+            models = _DEFAULT_MODELS
+
+        self._set_model_list(piper_models, models)
 
+    def _set_model_list(self, piper_models: dict, models) -> None:
+        """Set model list, with a set of models for fast lookups.
+
+        Args:
+            piper_models (dict): models by country and voice
+            models (iterable): all models
+        """
         self._piper_models = piper_models
-        self._models = models
-        self._countrys = list(piper_models.keys())
+        self._models = tuple(models)
+        self._models_set = frozenset(self._models)
+        self._countrys = tuple(piper_models)
 
     def update_model_list(self):
         """Fetch latest model list from network and save to cache.
@@ -135,9 +265,7 @@ class Piper(_Base):
             self.log.warning("No local model list available, keeping current list")
 
         if models:
-            self._piper_models = piper_models
-            self._models = models
-            self._countrys = list(piper_models.keys())
+            self._set_model_list(piper_models, models)
 
     def get_language(self) -> str:
         """ Get language from model.
@@ -145,8 +273,7 @@ class Piper(_Base):
         Returns:
             str: language
         """
-        language = self.model.split("-")[0]
-        return language
+        return self._language
 
     def is_model_downloaded(self, model: str) -> bool:
         """ Check if model is downloaded.
@@ -159,13 +286,25 @@ class Piper(_Base):
         """
         if model is None:
             model = self.model
-        onnx_file = os.path.join(PIPER_MODEL_DIR, model + ".onnx")
-        json_file = onnx_file + ".json"
-        onnx_exists = os.path.exists(onnx_file)
-        json_exists = os.path.exists(json_file)
-        self.log.debug(f"Model {model} onnx file exists: {onnx_exists}")
-        self.log.debug(f"Model {model} json file exists: {json_exists}")
-        return onnx_exists and json_exists
+        downloaded = model in self._downloaded_set()
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(f"Model {model} onnx and json files exist: {downloaded}")
+        return downloaded
+
+    def _downloaded_set(self) -> set:
+        """ Get downloaded models, listed once with a single directory scan.
+
+        Returns:
+            set: models that have both the onnx and the json file
+        """
+        if self._downloaded_cache is None:
+            with os.scandir(PIPER_MODEL_DIR) as entries:
+                names = {entry.name for entry in entries}
+            self._downloaded_cache = {
+                name[:-len(".onnx")] for name in names
+                if name.endswith(".onnx") and name + ".json" in names
+            }
+        return self._downloaded_cache
     
     def download_model(self,
                         model: str,
@@ -180,11 +319,18 @@ class Piper(_Base):
         """ 
         model_path = self.get_model_path(model)
         if not self.is_model_downloaded(model) or force:
+            # Copies made from the old file are stale
+            for derived_path in self._derived_model_paths(model):
+                if os.path.exists(derived_path):
+                    os.remove(derived_path)
             self.log.info(f"Downloading model {model} to {model_path}")
-            download_voice(model,
-                            Path(PIPER_MODEL_DIR),
-                            force_redownload=force,
-                            progress_callback=progress_callback)
+            try:
+                download_voice(model,
+                                Path(PIPER_MODEL_DIR),
+                                force_redownload=force,
+                                progress_callback=progress_callback)
+            finally:
+                self._downloaded_cache = None
 
     def fix_chinese_punctuation(self, text: str) -> str:
         """Replace Chinese punctuation with English punctuation.
@@ -195,30 +341,13 @@ class Piper(_Base):
         Returns:
             str: text with English punctuation
         """
-        if self.get_language() != "zh_CN":
+        if self._language != "zh_CN":
+            return text
+        if not _ZH_PUNCT_PRECHECK_RE.search(text):
             return text
-        MAP = {
-            '，': '. ',
-            '。': '. ',
-            '！': '! ',
-            '？': '? ',
-            '——': '. ',
-            '“': '"',
-            '”': '"',
-            '‘': "'",
-            '’': "'",
-            "~": ". ",
-            "～": ". ",
-            "：": ". ",
-            "...": ". ",
-            "……": ". ",
-            "、": ". ",
-        }
-        for k, v in MAP.items():
-            text = text.replace(k, v)
+        text = _ZH_PUNCT_RE.sub(lambda m: _ZH_PUNCT_MAP[m.group(0)], text)
         # find number followed by dot and replace with number followed by 点
-        import re
-        text = re.sub(r'(\d)\.(\d)', r'\1点\2', text)
+        text = _ZH_NUM_DOT_RE.sub(r'\1点\2', text)
 
         return text
 
@@ -239,6 +368,39 @@ class Piper(_Base):
         with wave.open(file, "wb") as wav_file:
             self.piper.synthesize_wav(text, wav_file)
 
+    def get_sample_rate(self) -> int:
+        """ Get the sample rate of the current model.
+
+        Returns:
+            int: sample rate in Hz
+
+        Raises:
+            ValueError: Model not set, set model first, with Piper.set_model(model)
+        """
+        if self.piper is None:
+            raise ValueError("Model not set, set model first, with Piper.set_model(model)")
+        return self.piper.config.sample_rate
+
+    def synthesize_bytes(self, text: str) -> bytes:
+        """ Synthesize text to raw PCM in memory.
+
+        Args:
+            text (str): text
+
+        Returns:
+            bytes: 16 bit mono PCM at get_sample_rate()
+
+        Raises:
+            ValueError: Model not set, set model first, with Piper.set_model(model)
+        """
+        if self.piper is None:
+            raise ValueError("Model not set, set model first, with Piper.set_model(model)")
+        text = self.fix_chinese_punctuation(text)
+        audio = bytearray()
+        for chunk in self.piper.synthesize(text):
+            audio.extend(chunk.audio_int16_bytes)
+        return bytes(audio)
+
     def stream(self, text: str) -> None:
         """ Stream text to speaker.
 
@@ -251,10 +413,78 @@ class Piper(_Base):
         if self.piper is None:
             raise ValueError("Model not set, set model first, with Piper.set_model(model)")
         text = self.fix_chinese_punctuation(text)
+        self._stop_event.clear()
+
+        # Synthesize in a producer thread, so the next sentence is computed
+        # while the current one plays. piper phonemizes all of its input
+        # before the first chunk, so feed it one sentence at a time to get
+        # the first audio out after the first sentence only. session.run
+        # releases the GIL, espeak phonemization doesn't, but per sentence
+        # it only holds it for a few ms, other threads keep running
+        chunks = queue.Queue(maxsize=4)
+        stop = threading.Event()
+        errors = []
+
+        def produce():
+            try:
+                for sentence in _split_sentences(text):
+                    for chunk in self.piper.synthesize(sentence):
+                        if stop.is_set():
+                            return
+                        chunks.put(chunk.audio_int16_bytes)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                chunks.put(None)
 
-        with AudioPlayer(self.piper.config.sample_rate) as player:
-            for chunk in self.piper.synthesize(text):
-                player.play(chunk.audio_int16_bytes)
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        finished = False
+        try:
+            with AudioPlayer(self.piper.config.sample_rate) as player:
+                self._player = player
+                while True:
+                    audio = chunks.get()
+                    if audio is None:
+                        finished = True
+                        # play() leaves anything under its threshold buffered
+                        player.flush_buffer()
+                        break
+                    if self._stop_event.is_set():
+                        break
+                    player.play(audio)
+        finally:
+            self._player = None
+            if not finished:
+                # Unblock the producer and wait for it to wind down
+                stop.set()
+                while chunks.get() is not None:
+                    pass
+            producer.join()
+        if errors:
+            raise errors[0]
+
+    def stop(self) -> None:
+        """ Stop a streaming say in progress, safe to call from another thread.
+
+        Playback stops within one audio chunk and synthesis of the rest is
+        dropped.
+        """
+        self._stop_event.set()
+        player = self._player
+        if player is not None:
+            player.stop()
+
+    def warmup(self) -> None:
+        """ Synthesize a short phrase without playing it.
+
+        onnxruntime sets up its buffers and kernels on the first run, doing
+        that here keeps it off the first say.
+        """
+        if self.piper is None:
+            return
+        for _ in self.piper.synthesize("Hi."):
+            pass
 
     def say(self, text: str, stream: bool = True) -> None:
         """ Say text.
@@ -271,31 +501,30 @@ class Piper(_Base):
         if stream:
             self.stream(text)
         else:
-            file = "./tts_piper.wav"
-            self.tts(text, file)
-            # Use the correct sample rate from Piper config
-            with AudioPlayer(self.piper.config.sample_rate) as player:
-                player.play_file(file)
+            # Synthesize everything first, then play from memory, no wav file round trip
+            audio = self.synthesize_bytes(text)
+            with AudioPlayer(self.piper.config.sample_rate, enable_buffering=False) as player:
+                player.play(audio)
 
-    def available_models(self, country: str = None) -> List[str]:
+    def available_models(self, country: str = None) -> Tuple[str, ...]:
         """ Get available models.
 
         Args:
             country (str, optional): country, leave it None to get all models, defaults to None
 
         Returns:
-            List[str]: available models
+            Tuple[str, ...]: available models, or a dict of models by voice if country is given
         """
         if country is None:
             return self._models
         else:
             return self._piper_models.get(country, [])
 
-    def available_countrys(self) -> List[str]:
+    def available_countrys(self) -> Tuple[str, ...]:
         """ Get available countrys.
 
         Returns:
-            List[str]: available countrys
+            Tuple[str, ...]: available countrys
         """
         return self._countrys
 
@@ -308,32 +537,267 @@ class Piper(_Base):
         Returns:
             str: model path
         """
-        return os.path.join(PIPER_MODEL_DIR, model + ".onnx")
+        return self._model_path(model)
 
-    def set_model(self, model: str) -> None:
-        """ Set model.
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _model_path(model: str) -> str:
+        """ Build model path once per model.
 
         Args:
             model (str): model
 
-        Raises:
-            ValueError: Model not found
+        Returns:
+            str: model path
+        """
+        return f"{PIPER_MODEL_DIR}/{model}.onnx"
+
+    def get_quantized_model_path(self, model: str) -> str:
+        """ Get INT8 quantized model path.
+
+        Args:
+            model (str): model
+
+        Returns:
+            str: quantized model path
+        """
+        return os.path.join(PIPER_MODEL_DIR, model + ".int8.onnx")
+
+    def _quantize_model(self, model: str) -> str:
+        """ Quantize model weights to INT8, once, next to the original.
+
+        Args:
+            model (str): model
+
+        Returns:
+            str: quantized model path
+        """
+        int8_path = self.get_quantized_model_path(model)
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            self.log.info(f"Quantizing model {model} to INT8, this only happens once")
+            tmp_path = int8_path + ".tmp"
+            quantize_dynamic(self.get_model_path(model), tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+        return int8_path
+
+    def _derived_model_paths(self, model: str) -> List[str]:
+        """ Get paths of files made from the downloaded model.
+
+        Args:
+            model (str): model
+
+        Returns:
+            List[str]: INT8 and external data copies
+        """
+        paths = []
+        for base in (os.path.join(PIPER_MODEL_DIR, model), os.path.join(PIPER_MODEL_DIR, model + ".int8")):
+            mmap_path = base + ".mmap.onnx"
+            paths.extend([mmap_path, mmap_path + ".data"])
+        paths.append(self.get_quantized_model_path(model))
+        return paths
+
+    def _externalize_model(self, model_path: str) -> str:
+        """ Move the weights of a model into an external data file, once.
+
+        ONNX Runtime memory maps external data, so weights are paged in on
+        demand and shared through the page cache instead of being copied
+        onto the heap.
+
+        Args:
+            model_path (str): onnx model path
+
+        Returns:
+            str: path of the model that refers to the external data
+        """
+        mmap_path = model_path[:-len(".onnx")] + ".mmap.onnx"
+        if not os.path.exists(mmap_path):
+            import onnx
+            from onnx.external_data_helper import convert_model_to_external_data
+            self.log.info(f"Moving weights of {model_path} to external data, this only happens once")
+            data_name = os.path.basename(mmap_path) + ".data"
+            data_path = os.path.join(os.path.dirname(mmap_path), data_name)
+            # onnx appends to an existing data file
+            if os.path.exists(data_path):
+                os.remove(data_path)
+            onnx_model = onnx.load(model_path)
+            convert_model_to_external_data(onnx_model, all_tensors_to_one_file=True, location=data_name)
+            tmp_path = mmap_path + ".tmp"
+            onnx.save_model(onnx_model, tmp_path)
+            os.replace(tmp_path, mmap_path)
+        return mmap_path
+
+    def _build_voice(self, model_path: str, config_path: str) -> PiperVoice:
+        """ Build a PiperVoice on an ONNX Runtime session tuned for this CPU.
+
+        Replaces PiperVoice.load, which always uses default session options.
+
+        Args:
+            model_path (str): onnx model path
+            config_path (str): model config json path
+
+        Returns:
+            PiperVoice: loaded voice
+        """
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = PiperConfig.from_dict(json.load(f))
+        session = onnxruntime.InferenceSession(
+            model_path,
+            sess_options=_session_options(),
+            providers=_session_providers(),
+        )
+        return PiperVoice(config=config, session=session)
+
+    def _load_file(self, model_path: str, config_path: str) -> PiperVoice:
+        """ Load one model file, memory mapped if mmap_weights is enabled.
+
+        Args:
+            model_path (str): onnx model path
+            config_path (str): model config json path
+
+        Returns:
+            PiperVoice: loaded voice
         """
-        if model in self._models:
+        if self._mmap_weights:
+            try:
+                return self._build_voice(self._externalize_model(model_path), config_path)
+            except Exception as e:
+                self.log.warning(f"Memory mapped load of {model_path} failed, loading into memory: {e}")
+        return self._build_voice(model_path, config_path)
+
+    def _load_voice(self, model: str) -> PiperVoice:
+        """ Load model, the INT8 copy if quantize is enabled.
+
+        Falls back to the original FP32 model if quantizing or loading
+        the INT8 copy fails.
+
+        Args:
+            model (str): model
+
+        Returns:
+            PiperVoice: loaded voice
+        """
+        model_path = self.get_model_path(model)
+        config_path = model_path + ".json"
+        if self._quantize:
+            try:
+                return self._load_file(self._quantize_model(model), config_path)
+            except Exception as e:
+                self.log.warning(f"INT8 model for {model} unavailable, using FP32: {e}")
+        return self._load_file(model_path, config_path)
+
+    def _cached_voice(self, key: tuple) -> PiperVoice:
+        """ Get a voice from the cache and mark it recently used.
+
+        Args:
+            key (tuple): cache key
+
+        Returns:
+            PiperVoice: voice, None if not cached
+        """
+        with self._voice_cache_lock:
+            voice = self._voice_cache.get(key)
+            if voice is not None:
+                self._voice_cache.move_to_end(key)
+            return voice
+
+    @classmethod
+    def _model_lock(cls, model: str) -> threading.Lock:
+        """ Get the lock serializing downloads and loads of one model.
+
+        Args:
+            model (str): model
+
+        Returns:
+            threading.Lock: lock for this model
+        """
+        with cls._voice_cache_lock:
+            return cls._voice_load_locks.setdefault(model, threading.Lock())
+
+    def _get_voice(self, model: str) -> PiperVoice:
+        """ Get a loaded voice, from the cache or by downloading and loading it.
+
+        Each model has its own lock, so a background prefetch and set_model
+        never load the same model twice, while a prefetch downloading one
+        model doesn't hold up loading another.
+
+        Args:
+            model (str): model
+
+        Returns:
+            PiperVoice: loaded voice
+        """
+        key = (model, self._quantize, self._mmap_weights)
+        voice = self._cached_voice(key)
+        if voice is not None:
+            return voice
+
+        with self._model_lock(model):
+            voice = self._cached_voice(key)
+            if voice is not None:
+                return voice
+
             model_path = self.get_model_path(model)
             if not self.is_model_downloaded(model):
                 self.log.warning(f"Model {model} not downloaded, downloading...")
                 self.download_model(model)
             try:
-                self.piper = PiperVoice.load(model_path)
+                voice = self._load_voice(model)
             except InvalidProtobuf as e:
                 self.log.warning(f"Failed to load model {model_path}: {e}, try to redownload model.")
                 self.download_model(model, force=True)
-                self.piper = PiperVoice.load(model_path)
-            self.model = model
-        else:
+                voice = self._load_voice(model)
+
+            with self._voice_cache_lock:
+                self._voice_cache[key] = voice
+                while len(self._voice_cache) > self.MAX_CACHED_VOICES:
+                    # Dropping the last reference frees the ORT session and its weights
+                    self._voice_cache.popitem(last=False)
+        return voice
+
+    def prefetch_model(self, model: str) -> None:
+        """ Download and load a model in the background.
+
+        A later set_model with this model is instant, as long as it is
+        still among the MAX_CACHED_VOICES most recently used.
+
+        Args:
+            model (str): model
+
+        Raises:
+            ValueError: Model not found
+        """
+        if model not in self._models_set:
             raise ValueError("Model not found")
-    
+
+        def prefetch():
+            try:
+                self._get_voice(model)
+            except Exception as e:
+                self.log.warning(f"Failed to prefetch model {model}: {e}")
+
+        threading.Thread(target=prefetch, daemon=True).start()
+
+    def set_model(self, model: str) -> None:
+        """ Set model.
+
+        Starts prefetching secondary_model afterwards, if set.
+
+        Args:
+            model (str): model
+
+        Raises:
+            ValueError: Model not found
+        """
+        if model not in self._models_set:
+            raise ValueError("Model not found")
+        self.piper = self._get_voice(model)
+        self.model = model
+        self._language = model.split("-")[0]
+
+        if self.secondary_model and self.secondary_model != model:
+            self.prefetch_model(self.secondary_model)
+
 def download_voice(voice: str,
                     download_dir: Path,
                     force_redownload: bool = False,
@@ -367,58 +831,231 @@ def download_voice(voice: str,
         "voice_quality": voice_quality,
     }
 
+    downloads = []
+
+    if force_redownload:
+        # Don't resume from a partial file of the old version
+        for extension in (".onnx", ".onnx.json"):
+            _partial_path(download_dir / f"{voice_code}{extension}").unlink(missing_ok=True)
+
     # 下载模型文件（带进度条）
     model_path = download_dir / f"{voice_code}.onnx"
     if force_redownload or _needs_download(model_path):
         model_url = URL_FORMAT.format(extension=".onnx",** format_args)
-        _download_with_progress(model_url, model_path, progress_callback)
+        downloads.append((model_url, model_path, progress_callback))
 
-    # 下载配置文件（带进度条）
+    # 下载配置文件，文件很小，不显示进度
     config_path = download_dir / f"{voice_code}.onnx.json"
     if force_redownload or _needs_download(config_path):
         config_url = URL_FORMAT.format(extension=".onnx.json", **format_args)
-        _download_with_progress(config_url, config_path, progress_callback)
+        downloads.append((config_url, config_path, lambda *_: None))
+
+    # Fetch both files at the same time, total time is the larger one, not the sum
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(_download_with_progress, *download) for download in downloads]
+        for future in futures:
+            future.result()
 
     # _LOGGER.info("Downloaded: %s", voice)
 
 
+def _get_http_client():
+    """ Get the shared httpx client, created on first use.
+
+    HTTP/2 is used when the h2 package is installed. Both files of a voice
+    then share one TLS connection.
+
+    Returns:
+        httpx.Client: client, None if httpx is not installed
+    """
+    global _HTTP_CLIENT
+    if not _httpx_available:
+        return None
+    with _HTTP_CLIENT_LOCK:
+        if _HTTP_CLIENT is None:
+            options = dict(
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                follow_redirects=True,
+            )
+            try:
+                _HTTP_CLIENT = httpx.Client(http2=True, **options)
+            except ImportError:
+                _HTTP_CLIENT = httpx.Client(**options)
+        return _HTTP_CLIENT
+
+
+def _partial_path(output_path: Path) -> Path:
+    """ Get the path a file is downloaded to before it is complete.
+
+    Args:
+        output_path (Path): output path
+
+    Returns:
+        Path: partial download path
+    """
+    return output_path.with_name(output_path.name + ".part")
+
+
 def _download_with_progress(url: str,
                             output_path: Path,
                             progress_callback: Callable[[int, int], None] = None) -> None:
     """ Download file with progress bar.
 
+    Data goes to a .part file, which is renamed to output_path only once
+    complete. A download that broke off resumes from the .part file with
+    an HTTP Range request. Uses a shared keep-alive httpx client when
+    available, urlopen otherwise.
+
     Args:
         url (str): URL
         output_path (Path): output path
         progress_callback (Callable[[int, int], None], optional): progress callback function, default is None
     """
-    with urlopen(url) as response:
-        file_size = int(response.headers.get("Content-Length", 0))
-        
-        if progress_callback:
-            progress_callback(0, file_size)
-        else:
-            progress_bar = tqdm(
-                total=file_size,
-                unit="B",
-                unit_scale=True,
-                unit_divisor=1024,
-                desc=f"Downloading {output_path.name}",
-                leave=True
-            )
-        
-        with open(output_path, "wb") as out_file:
-            while True:
-                chunk = response.read(8192)  # 8KB 块
-                if not chunk:
-                    break
-                out_file.write(chunk)
-                if progress_callback:
-                    progress_callback(len(chunk), file_size)
-                else:
-                    progress_bar.update(len(chunk))
-        
-        if progress_callback:
-            progress_callback(file_size, file_size)
-        else:
-            progress_bar.close()
+    partial_path = _partial_path(output_path)
+    offset = partial_path.stat().st_size if partial_path.exists() else 0
+    if offset:
+        # The .part file holds decoded bytes, so a resumed range must be
+        # of the uncompressed file
+        headers = {"Range": f"bytes={offset}-", "Accept-Encoding": "identity"}
+    else:
+        headers = {"Accept-Encoding": _ACCEPT_ENCODING}
+
+    client = _get_http_client()
+    if client is not None:
+        with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 416:
+                # Partial file doesn't fit the file on the server, start over
+                partial_path.unlink()
+                return _download_with_progress(url, output_path, progress_callback)
+            response.raise_for_status()
+            if response.status_code != 206:
+                offset = 0
+            file_size = offset + int(response.headers.get("Content-Length", 0))
+            # httpx decodes on its own, count progress off the wire to match Content-Length
+            _write_with_progress(response.iter_bytes(chunk_size=1 << 20), partial_path, file_size, progress_callback, offset,
+                                 wire_count=lambda: response.num_bytes_downloaded)
+    else:
+        try:
+            response = urlopen(Request(url, headers=headers))
+        except HTTPError as e:
+            if e.code != 416:
+                raise
+            partial_path.unlink()
+            return _download_with_progress(url, output_path, progress_callback)
+        with response:
+            if response.status != 206:
+                offset = 0
+            file_size = offset + int(response.headers.get("Content-Length", 0))
+            encoding = response.headers.get("Content-Encoding", "identity").strip().lower()
+            if encoding == "identity":
+                _write_with_progress(_read_chunks(response), partial_path, file_size, progress_callback, offset)
+            else:
+                wire = _CountingReader(response)
+                _write_with_progress(_read_chunks(_decoding_reader(wire, encoding)), partial_path, file_size,
+                                     progress_callback, offset, wire_count=lambda: wire.count)
+
+    os.replace(partial_path, output_path)
+
+
+class _CountingReader:
+    """ File-like wrapper counting the bytes read through it. """
+
+    def __init__(self, raw) -> None:
+        self.raw = raw
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.count += len(data)
+        return data
+
+
+def _decoding_reader(raw, encoding: str):
+    """ Wrap a compressed stream in a reader that decompresses on the fly.
+
+    Args:
+        raw (file-like): compressed stream
+        encoding (str): Content-Encoding of the stream
+
+    Returns:
+        file-like: reader of decompressed data
+
+    Raises:
+        ValueError: Unsupported Content-Encoding
+    """
+    if encoding in ("gzip", "x-gzip"):
+        return gzip.GzipFile(fileobj=raw)
+    if encoding == "zstd" and _zstd_available:
+        return zstandard.ZstdDecompressor().stream_reader(raw)
+    raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+
+def _read_chunks(response):
+    """ Read a urlopen response in 1MB chunks.
+
+    Chunks are views of one reused buffer, write each out before taking the next.
+
+    Args:
+        response (http.client.HTTPResponse): response
+
+    Yields:
+        memoryview: chunk
+    """
+    # 1MB 块，读入复用的缓冲区，避免每块分配新的 bytes
+    buffer = bytearray(1 << 20)
+    view = memoryview(buffer)
+    while True:
+        size = response.readinto(buffer)
+        if not size:
+            break
+        yield view[:size]
+
+
+def _write_with_progress(chunks,
+                         output_path: Path,
+                         file_size: int,
+                         progress_callback: Callable[[int, int], None] = None,
+                         offset: int = 0,
+                         wire_count: Callable[[], int] = None) -> None:
+    """ Write chunks to file with progress bar.
+
+    Args:
+        chunks (iterable): data chunks
+        output_path (Path): output path
+        file_size (int): expected file size, 0 if unknown
+        progress_callback (Callable[[int, int], None], optional): progress callback function, default is None
+        offset (int, optional): bytes already in the file, chunks are appended after them, default is 0
+        wire_count (Callable[[], int], optional): bytes received so far, for a compressed transfer
+            where chunks are decoded and file_size is the compressed size, default is None
+    """
+    if progress_callback:
+        progress_callback(offset, file_size)
+    else:
+        progress_bar = tqdm(
+            total=file_size,
+            initial=offset,
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+            desc=f"Downloading {output_path.name}",
+            leave=True
+        )
+
+    received = 0
+    with open(output_path, "ab" if offset else "wb") as out_file:
+        for chunk in chunks:
+            out_file.write(chunk)
+            if wire_count is None:
+                step = len(chunk)
+            else:
+                step = wire_count() - received
+                received += step
+            if progress_callback:
+                progress_callback(step, file_size)
+            else:
+                progress_bar.update(step)
+
+    if progress_callback:
+        progress_callback(file_size, file_size)
+    else:
+        progress_bar.close()
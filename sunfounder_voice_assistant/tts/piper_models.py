@@ -202,12 +202,11 @@ PIPER_MODELS = {
 }
 """ Piper models. """
 
-COUNTRYS = list(PIPER_MODELS.keys())
+COUNTRYS = tuple(PIPER_MODELS)
 """Supported countries."""
 
-MODELS = []
+MODELS = tuple(model for voices in PIPER_MODELS.values() for models in voices.values() for model in models)
 """Supported models."""
 
-for country in COUNTRYS:
-    for model in PIPER_MODELS[country].keys():
-        MODELS += PIPER_MODELS[country][model]
\ No newline at end of file
+MODELS_SET = frozenset(MODELS)
+"""Supported models, for membership checks."""
@@ -3,9 +3,20 @@ from .stt import STT
 from .tts import Piper as TTS
 
 from ._keyboard_input import KeyboardInput
-
-from typing import Any, Callable, Optional
-
+from ._audio_player import AudioPlayer
+
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Iterator, Optional
+
+import io
+import json
+import logging
+import queue
+import re
+import signal
+import sys
+import threading
 import time
 
 NAME = "Buddy"
@@ -38,6 +49,51 @@ WELCOME = f"Hi, I'm {NAME}. Wake me up with: " + ", ".join(WAKE_WORD)
 INSTRUCTIONS = f"You are a helpful assistant, named {NAME}."
 """ Default set instructions """
 
+TRIGGER_POLL_INTERVAL = 0.1
+""" Max seconds between trigger checks, built-in triggers wake the loop at once """
+
+PARTIAL_PRINT_INTERVAL = 0.1
+""" Min seconds between partial STT result prints while listening """
+
+TTS_CACHE_SIZE = 64
+""" Max phrases, like the welcome message, kept synthesized in memory """
+
+SENTENCE_MAX_TOKENS = 80
+""" Max LLM tokens buffered before a chunk is spoken without a sentence end """
+
+# Words hinting the user is talking about what the camera sees
+_VISION_CUE_RE = re.compile(
+    r"\b(?:see|saw|look|looks|looking|watch|show|picture|photo|image|camera|"
+    r"colou?r|this|that|these|those|here|there|front|hold|holding|hand|wear|wearing|"
+    r"read|room|object|thing|shape|who|where)\b"
+    r"|看|见|这|那|颜色|照片|图|拍|镜头|手里|前面",
+    re.IGNORECASE)
+
+# End of a sentence, English needs the space after so "3.14" isn't split
+_SENTENCE_END_RE = re.compile(r'[.?!]["\')\]]*\s|[。！？]')
+_CLAUSE_END_RE = re.compile(r'[,，]\s*$')
+
+
+def _sentence_boundary(text: str, tokens: int) -> int:
+    """ Find where the text can be cut to speak its beginning
+
+    Args:
+        text (str): Buffered text
+        tokens (int): Number of tokens buffered
+
+    Returns:
+        int: Length of the part to speak, 0 to keep buffering
+    """
+    match = _SENTENCE_END_RE.search(text)
+    if match:
+        return match.end()
+    # A long clause, don't wait for the sentence to end
+    if _CLAUSE_END_RE.search(text) and len(text.split()) >= 4:
+        return len(text)
+    if tokens >= SENTENCE_MAX_TOKENS:
+        return len(text)
+    return 0
+
 
 class VoiceAssistant:
     """ Voice assistant class
@@ -56,6 +112,8 @@ class VoiceAssistant:
         welcome (str, optional): Welcome message, default is WELCOME
         instructions (str, optional): Set instructions, default is INSTRUCTIONS
         disable_think (bool, optional): Disable think, default is False
+        warmup (bool, optional): Warm up TTS and STT on init, so the first round is not slower, default is True
+        barge_in (bool, optional): Saying the wake word while the assistant talks interrupts it, needs wake_enable, default is False
     """
 
     def __init__(self,
@@ -72,6 +130,8 @@ class VoiceAssistant:
             welcome: str = WELCOME,
             instructions: str = INSTRUCTIONS,
             disable_think: bool = False,
+            warmup: bool = True,
+            barge_in: bool = False,
         ) -> None:
         self.llm = llm
         self.name = name
@@ -82,6 +142,7 @@ class VoiceAssistant:
         self.answer_on_wake = answer_on_wake
         self.welcome = welcome
         self.disable_think = disable_think
+        self.barge_in = barge_in
         self.instructions = instructions.format(name=name)
 
         self.tts = tts or TTS(model=tts_model)
@@ -94,16 +155,39 @@ class VoiceAssistant:
         self.wake_waiting = False
         self.wait_wake_thread = None
         self.triggers = []
+        self._trigger_queue = queue.SimpleQueue()
+        self._cancel = threading.Event()
+        self._barged_in = False
+        self._turn_timings = {}
+        self._last_image = None
+        self._tts_cache = OrderedDict()
+        self.log = logging.getLogger(__name__)
 
         if self.wake_enable:
             self.add_trigger(self.trigger_wake_word)
         
         if self.keyboard_enable:
-            self.keyboard_input = KeyboardInput()
+            self.keyboard_input = KeyboardInput(on_result=partial(self.notify_trigger, self.trigger_keyboard_input))
             self.add_trigger(self.trigger_keyboard_input)
 
+        # Camera starts in a thread, TTS/STT warm up and the welcome
+        # message plays meanwhile
+        self.picam2 = None
+        self._camera_thread = None
+        self._camera_error = None
         if self.with_image:
-            self.init_camera()
+            self._camera_thread = threading.Thread(name="camera_init_thread", target=self._init_camera_background, daemon=True)
+            self._camera_thread.start()
+
+        if warmup:
+            self.warmup()
+
+    def warmup(self) -> None:
+        """ Warm up TTS and STT engines that support it """
+        for engine in (self.tts, self.stt):
+            warmup = getattr(engine, "warmup", None)
+            if warmup is not None:
+                warmup()
 
     def before_listen(self) -> None:
         """ Before listen """
@@ -160,14 +244,42 @@ class VoiceAssistant:
         """
         return text
 
+    def needs_vision(self, text: str) -> bool:
+        """ Check if the message may be about what the camera sees
+
+        Messages that don't, like "what time is it", are sent without an
+        image, saving the capture and the model's image processing. Override
+        to return True to always send one.
+
+        Args:
+            text (str): Message
+
+        Returns:
+            bool: True to send an image with the message
+        """
+        return bool(text) and _VISION_CUE_RE.search(text) is not None
+
     def add_trigger(self, trigger_function: Callable[[], tuple[bool, bool, str]]) -> None:
         """ Add trigger function
 
+        Triggers are checked every TRIGGER_POLL_INTERVAL, call
+        notify_trigger(trigger_function) when one is ready to have it
+        checked right away.
+
         Args:
             trigger_function (Callable[[], tuple[bool, bool, str]]): Trigger function
         """
         self.triggers.append(trigger_function)
 
+    def notify_trigger(self, trigger_function: Optional[Callable[[], tuple[bool, bool, str]]] = None) -> None:
+        """ Wake the main loop to check a trigger now, safe to call from any thread
+
+        Args:
+            trigger_function (Callable[[], tuple[bool, bool, str]], optional): Trigger
+                that is ready, checked before the others, default is None to check all
+        """
+        self._trigger_queue.put(trigger_function)
+
     def before_say(self, text: str) -> None:
         """ Before say
 
@@ -198,9 +310,23 @@ class VoiceAssistant:
         Args:
             path (str): Path to save image
         """
+        self._wait_camera()
         if self.with_image and self.picam2:
             self.picam2.capture_file(path)
 
+    def capture_image_bytes(self) -> Optional[bytes]:
+        """ Capture image as JPEG in memory
+
+        Returns:
+            bytes: JPEG data, None if no camera
+        """
+        self._wait_camera()
+        if self.with_image and self.picam2:
+            buffer = io.BytesIO()
+            self.picam2.capture_file(buffer, format="jpeg")
+            return buffer.getvalue()
+        return None
+
     def trigger_wake_word(self) -> tuple[bool, bool, str]:
         """ Trigger wake word
 
@@ -216,7 +342,7 @@ class VoiceAssistant:
             self.stt.stop_listening()
             self.on_wake()
             if len(self.answer_on_wake) > 0:
-                self.tts.say(self.answer_on_wake)
+                self.say_cached(self.answer_on_wake)
 
             print("Waked, Listening ...")
             message = self.listen()
@@ -248,10 +374,34 @@ class VoiceAssistant:
         self.picam2.configure(self.picam2.create_preview_configuration(main={"size": (640, 480)}))
         self.picam2.start()
 
+    def _init_camera_background(self) -> None:
+        """ Initialize camera in the camera init thread """
+        try:
+            self.init_camera()
+        except Exception as e:
+            self._camera_error = e
+
+    def _wait_camera(self) -> None:
+        """ Wait for the camera init thread to finish
+
+        Raises:
+            Exception: Camera initialization failed, raised once
+        """
+        if self._camera_thread is None:
+            return
+        self._camera_thread.join()
+        self._camera_thread = None
+        if self._camera_error is not None:
+            error, self._camera_error = self._camera_error, None
+            raise error
+
     def close_camera(self) -> None:
         """ Close camera """
+        if self._camera_thread is not None:
+            self._camera_thread.join()
         if self.with_image and self.picam2:
             self.picam2.close()
+            self.picam2 = None
 
     def listen(self) -> str:
         """ Listen
@@ -261,16 +411,24 @@ class VoiceAssistant:
         """
         self.before_listen()
 
+        self._mark("listen_start")
         stt_result = ""
+        last_print = 0.0
         for result in self.stt.listen(stream=True):
             if self.running == False:
                 break
             if result["done"]:
+                self._mark("listen_final")
                 print(f"heard: {result['final']}")
                 stt_result = result['final']
             else:
-                print(f"heard: {result['partial']}", end="\r", flush=True)
+                self._mark("listen_partial")
+                now = time.perf_counter()
+                if now - last_print >= PARTIAL_PRINT_INTERVAL:
+                    last_print = now
+                    print(f"heard: {result['partial']}", end="\r", flush=True)
         print("")
+        self._mark("listen_end")
 
         if stt_result == False or stt_result == "":
             stt_result = None
@@ -278,6 +436,31 @@ class VoiceAssistant:
         self.after_listen(stt_result)
         return stt_result
 
+    def _prompt(self, text: str, disable_image: bool=False) -> Iterator[str]:
+        """ Prompt the LLM, with an image if enabled
+
+        Args:
+            text (str): Text to think
+            disable_image (bool, optional): Disable image, defaults to False
+
+        Returns:
+            Iterator[str]: LLM response stream
+        """
+        # Use the frame main() captured when the user finished, capture now
+        # if called on its own. Encoded in memory, no file write
+        image, self._last_image = self._last_image, None
+        if not self.with_image or disable_image:
+            image = None
+        elif image is None:
+            image = self.capture_image_bytes()
+        kwargs = {
+            'image_path': image,
+            'stream': True,
+        }
+        if self.disable_think:
+            kwargs['think'] = False
+        return self.llm.prompt(text, **kwargs)
+
     def think(self, text: str, disable_image: bool=False) -> str:
         """ Think
 
@@ -290,46 +473,192 @@ class VoiceAssistant:
         """ 
         self.before_think(text)
 
-        if self.with_image and not disable_image:
-            image_path = './img_input.jpeg'
-            self.capture_image(image_path)
-        else:
-            image_path = None
-        kwargs = {
-            'image_path': image_path,
-            'stream': True,
-        }
-        if self.disable_think:
-            kwargs['think'] = False
-        response = self.llm.prompt(text, **kwargs)
-        llm_text = ""
+        response = self._prompt(text, disable_image=disable_image)
+        llm_text = []
         for next_word in response:
             if self.running == False:
                 break
             if next_word:
                 print(next_word, end="", flush=True)
-                llm_text += next_word
+                llm_text.append(next_word)
         print('')
-        result = llm_text.strip()
+        result = "".join(llm_text).strip()
         self.after_think(result)
         return result
 
+    def think_stream(self, text: str, disable_image: bool=False) -> Iterator[str]:
+        """ Think, yielding the response a sentence at a time
+
+        Each sentence is yielded as soon as the LLM finishes it, so it can be
+        spoken while the rest is still being generated.
+
+        Args:
+            text (str): Text to think
+            disable_image (bool, optional): Disable image, defaults to False
+
+        Yields:
+            str: Response sentence
+        """
+        self.before_think(text)
+
+        self._mark("think_start")
+        response = self._prompt(text, disable_image=disable_image)
+        llm_text = []
+        buffer = ""
+        tokens = 0
+        # Flush once per sentence, not per token, and not at all when redirected
+        interactive = sys.stdout.isatty()
+        for next_word in response:
+            if self.running == False or self._cancel.is_set():
+                break
+            if not next_word:
+                continue
+            if not llm_text:
+                self._mark("llm_first_token")
+            sys.stdout.write(next_word)
+            llm_text.append(next_word)
+            buffer += next_word
+            tokens += 1
+            cut = _sentence_boundary(buffer, tokens)
+            if cut:
+                if interactive:
+                    sys.stdout.flush()
+                sentence = buffer[:cut].strip()
+                buffer = buffer[cut:]
+                tokens = 0
+                if sentence:
+                    yield sentence
+        print('')
+        self._mark("think_end")
+        if self.running and not self._cancel.is_set() and buffer.strip():
+            yield buffer.strip()
+        self.after_think("".join(llm_text).strip())
+
+    def say_cached(self, text: str) -> None:
+        """ Say a phrase that is said often, keeping its audio in memory
+
+        Falls back to a plain say if the TTS can't synthesize to memory.
+
+        Args:
+            text (str): Text to say
+        """
+        synthesize = getattr(self.tts, "synthesize_bytes", None)
+        get_sample_rate = getattr(self.tts, "get_sample_rate", None)
+        if synthesize is None or get_sample_rate is None:
+            self.tts.say(text)
+            return
+        # Model in the key, so switching voice doesn't replay the old one
+        key = (getattr(self.tts, "model", None), text)
+        audio = self._tts_cache.get(key)
+        if audio is None:
+            audio = synthesize(text)
+            self._tts_cache[key] = audio
+            if len(self._tts_cache) > TTS_CACHE_SIZE:
+                self._tts_cache.popitem(last=False)
+        else:
+            self._tts_cache.move_to_end(key)
+        with AudioPlayer(get_sample_rate(), enable_buffering=False) as player:
+            player.play(audio)
+
+    def _say_worker(self, sentences: queue.Queue, errors: list) -> None:
+        """ Speak sentences from the queue until None is received
+
+        Args:
+            sentences (queue.Queue): Sentences to say
+            errors (list): Exceptions raised while speaking are appended here
+        """
+        while True:
+            text = sentences.get()
+            if text is None:
+                break
+            if self.running == False or errors or self._cancel.is_set():
+                # Drain the rest so the producer never blocks
+                continue
+            try:
+                self.before_say(text)
+                if "say_start" not in self._turn_timings:
+                    self._mark("say_start")
+                self.tts.say(text)
+                self._mark("say_end")
+            except Exception as e:
+                errors.append(e)
+
+    def interrupt(self) -> None:
+        """ Interrupt the current reply, safe to call from any thread
+
+        Stops the LLM stream and drops the sentences not yet spoken. The
+        sentence being spoken is cut short if the TTS has a stop method.
+        """
+        self._cancel.set()
+        stop = getattr(self.tts, "stop", None)
+        if stop is not None:
+            stop()
+
+    def stop(self) -> None:
+        """ Stop the assistant, safe to call from any thread or a signal handler
+
+        The reply in progress is interrupted and run() returns once the
+        main loop notices, within TRIGGER_POLL_INTERVAL when idle.
+        """
+        self.running = False
+        self.interrupt()
+        self.notify_trigger()
+
+    def _barge_in(self) -> None:
+        """ Wake word heard while replying, interrupt and handle it as a wake """
+        self._barged_in = True
+        self.interrupt()
+
+    def _mark(self, name: str) -> None:
+        """ Record a timestamp for this round's latency log
+
+        Args:
+            name (str): Name of the point in the round
+        """
+        self._turn_timings[name] = time.perf_counter()
+
+    def _log_turn_timings(self) -> None:
+        """ Log the latency of each stage of the round as one JSON line, at debug level """
+        if not self.log.isEnabledFor(logging.DEBUG):
+            return
+        timings = self._turn_timings
+
+        def ms(start, end):
+            if start in timings and end in timings:
+                return round((timings[end] - timings[start]) * 1000, 1)
+            return None
+
+        self.log.debug(json.dumps({
+            "STT_ms": ms("listen_start", "listen_end"),
+            "STT_finalize_ms": ms("listen_partial", "listen_final"),
+            "LLM_TTFT_ms": ms("think_start", "llm_first_token"),
+            "LLM_total_ms": ms("think_start", "think_end"),
+            "TTS_TTFA_ms": ms("think_start", "say_start"),
+            "TTS_total_ms": ms("say_start", "say_end"),
+        }))
+
     def main(self) -> None:
         """ Main loop """
 
         self.running = True
         self.on_start()
-        self.tts.say(self.welcome)
+        self.say_cached(self.welcome)
 
         # Main loop
         while self.running:
             triggered = False
             message = ''
             disable_image = False
-
-            # Start listening wake words if wake enabled
-            if self.wake_enable:
-                self.stt.start_listening_wake_words()
+            self._turn_timings = {}
+            self._cancel.clear()
+
+            # Start listening wake words if wake enabled, a wake that
+            # interrupted the last reply is handled right away
+            if self._barged_in:
+                self._barged_in = False
+                self.notify_trigger(self.trigger_wake_word)
+            elif self.wake_enable:
+                self.stt.start_listening_wake_words(on_wake=partial(self.notify_trigger, self.trigger_wake_word))
             
             # Start keyboard input
             if self.keyboard_enable:
@@ -337,14 +666,32 @@ class VoiceAssistant:
             
             # Wait for triggers
             while self.running:
-
-                for trigger in self.triggers:
-                    triggered, disable_image, message = trigger()
-                    if triggered:
-                        break
+                try:
+                    ready = self._trigger_queue.get(timeout=TRIGGER_POLL_INTERVAL)
+                except queue.Empty:
+                    ready = None
+                # The notifying trigger goes first, the rest are polled for
+                # triggers that don't notify. A trigger still checks it is
+                # ready, so a stale notification from last round is harmless
+                if ready is not None:
+                    triggered, disable_image, message = ready()
+                if not triggered:
+                    for trigger in self.triggers:
+                        triggered, disable_image, message = trigger()
+                        if triggered:
+                            break
                 if triggered:
                     break
-                time.sleep(0.01)
+            if not triggered:
+                # Stopped while waiting, there is nothing to answer
+                break
+
+            # Capture as soon as the user is done, so the image matches
+            # what they were talking about
+            if triggered and self.with_image and not disable_image:
+                disable_image = not self.needs_vision(message)
+            if triggered and self.with_image and not disable_image:
+                self._last_image = self.capture_image_bytes()
 
             # Stop listening wake words if wake enabled
             if self.wake_enable:
@@ -354,24 +701,48 @@ class VoiceAssistant:
             if self.keyboard_enable:
                 self.keyboard_input.stop()
 
-            # think
-            result = self.think(message, disable_image=disable_image)
-            response_text = self.parse_response(result)
-
-            # tts
-            _status = False
-            if response_text != '':
-                self.before_say(response_text)
-                self.tts.say(response_text)
+            # Keep listening for the wake word while replying, to be interrupted
+            listen_barge_in = self.barge_in and self.wake_enable and self.running
+            if listen_barge_in:
+                self.stt.start_listening_wake_words(on_wake=self._barge_in)
+
+            # think and say, sentences are spoken in a thread while the
+            # LLM keeps generating the next ones
+            sentences = queue.Queue()
+            errors = []
+            speaker = threading.Thread(name="say_thread", target=self._say_worker, args=(sentences, errors), daemon=True)
+            speaker.start()
+            try:
+                for sentence in self.think_stream(message, disable_image=disable_image):
+                    response_text = self.parse_response(sentence)
+                    if response_text != '':
+                        sentences.put(response_text)
+            except BaseException:
+                # Ctrl-C or an error, don't wait for the rest of the reply
+                self.interrupt()
+                raise
+            finally:
+                sentences.put(None)
+                speaker.join()
+                if listen_barge_in:
+                    # Joins the wake word thread, the next round's can't overlap it
+                    self.stt.stop_listening()
+            if errors:
+                raise errors[0]
 
             # on finish a round
             self.on_finish_a_round()
-
-            # Wait a second before next round
-            time.sleep(1)
+            self._log_turn_timings()
 
     def run(self) -> None:
-        """ Run """
+        """ Run
+
+        Ctrl-C or SIGTERM stop the assistant without waiting for the reply
+        in progress to finish.
+        """
+        previous_sigterm = None
+        if threading.current_thread() is threading.main_thread():
+            previous_sigterm = signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
         try:
             self.main()
         except KeyboardInterrupt:
@@ -379,6 +750,8 @@ class VoiceAssistant:
         except Exception as e:
             print(f"\033[31mERROR: {e}\033[m")
         finally:
+            if previous_sigterm is not None:
+                signal.signal(signal.SIGTERM, previous_sigterm)
             self.running = False
             self.stt.close()
             if self.keyboard_enable:
@@ -0,0 +1,234 @@
+import io
+import os
+import wave
+from concurrent.futures import Future
+
+import pytest
+
+openai_tts = pytest.importorskip("sunfounder_voice_assistant.tts.openai_tts")
+OpenAI_TTS = openai_tts.OpenAI_TTS
+
+
+@pytest.fixture
+def tts(tmp_path):
+    tts = OpenAI_TTS()
+    tts.CACHE_DIR = str(tmp_path / "cache")
+    yield tts
+    tts.close()
+
+
+class FakePlayer:
+    """ Records what would be played """
+    def __init__(self):
+        self.played = []
+        self.flushed = False
+
+    def play(self, chunk):
+        self.played.append(chunk)
+
+    def flush_buffer(self):
+        self.flushed = True
+
+
+def test_stream_audio_plays_every_chunk():
+    chunks = [b"\x01\x00" * 100, b"", b"\x02\x00" * 100, b"\x03\x00" * 100]
+    player = FakePlayer()
+    written = []
+
+    OpenAI_TTS._stream_audio(None, iter(chunks), player, write=written.append)
+
+    expected = [chunk for chunk in chunks if chunk]
+    assert player.played == expected
+    assert written == expected
+    assert player.flushed
+
+
+def test_stream_audio_reader_error_ends_writer():
+    def broken_chunks():
+        yield b"\x01\x00" * 100
+        raise ConnectionError("connection dropped")
+
+    player = FakePlayer()
+
+    with pytest.raises(ConnectionError):
+        OpenAI_TTS._stream_audio(None, broken_chunks(), player)
+    assert player.played == [b"\x01\x00" * 100]
+
+
+def test_stream_audio_player_error_is_raised():
+    class BrokenPlayer(FakePlayer):
+        def play(self, chunk):
+            raise OSError("device gone")
+
+    chunks = [b"\x01\x00" * 100] * 20
+
+    with pytest.raises(OSError):
+        OpenAI_TTS._stream_audio(None, iter(chunks), BrokenPlayer())
+
+
+def make_wav(pcm, rate=24000, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def test_strip_wav_header_passes_pcm_through(tts):
+    chunks = [b"\x01\x00" * 100, b"\x02\x00" * 100]
+
+    assert b"".join(tts._strip_wav_header(iter(chunks))) == b"".join(chunks)
+
+
+def test_strip_wav_header_drops_header(tts):
+    pcm = b"\x01\x00\x02\x00" * 100
+    wav = make_wav(pcm)
+    # Header split over several small chunks
+    chunks = [wav[i:i + 5] for i in range(0, 60, 5)] + [wav[60:]]
+
+    assert b"".join(tts._strip_wav_header(iter(chunks))) == pcm
+
+
+def test_strip_wav_header_skips_extra_chunks(tts):
+    pcm = b"\x01\x00" * 100
+    wav = make_wav(pcm)
+    # Odd sized LIST chunk before data, padded to an even size
+    extra = b"LIST" + (3).to_bytes(4, "little") + b"abc\x00"
+    wav = wav[:36] + extra + wav[36:]
+
+    assert b"".join(tts._strip_wav_header(iter([wav]))) == pcm
+
+
+def test_strip_wav_header_wrong_format(tts):
+    with pytest.raises(ValueError):
+        list(tts._strip_wav_header(iter([make_wav(b"\x01\x00" * 100, rate=16000)])))
+
+
+def test_strip_wav_header_truncated(tts):
+    with pytest.raises(ValueError):
+        list(tts._strip_wav_header(iter([make_wav(b"")[:30]])))
+
+
+def test_say_sentence_bad_audio_is_logged(tts):
+    future = Future()
+    future.set_exception(ValueError("Unexpected WAV format"))
+    tts._prefetched[("hello", None, tts._voice, tts._model)] = future
+
+    tts._say_sentence("hello")
+
+
+def test_tts_stream_bad_audio_returns_false(tts):
+    tts._cache_load = lambda *args: make_wav(b"\x01\x00" * 100, rate=16000)
+    player = FakePlayer()
+    tts._get_player = lambda: player
+
+    assert tts.tts("hello", stream=True) is False
+    assert player.played == []
+
+
+@pytest.fixture
+def said(tts):
+    said = []
+    tts.say = lambda words, instructions=None: said.append((words, instructions))
+    tts.BATCH_DELAY = 60
+    return said
+
+
+def test_say_buffered_joins_pieces(tts, said):
+    tts.say_buffered("Hello")
+    tts.say_buffered("there.")
+    assert said == []
+
+    tts.flush()
+
+    assert said == [("Hello there.", None)]
+    tts.flush()
+    assert said == [("Hello there.", None)]
+
+
+def test_say_buffered_full_batch_is_said(tts, said):
+    tts.BATCH_MAX_CHARS = 10
+
+    tts.say_buffered("Hello")
+    tts.say_buffered("world!")
+
+    assert said == [("Hello world!", None)]
+    assert tts._flush_timer is None
+
+
+def test_say_buffered_new_instructions_send_old_batch(tts, said):
+    tts.say_buffered("Hello", instructions="calm")
+    tts.say_buffered("Run!", instructions="urgent")
+
+    assert said == [("Hello", "calm")]
+    tts.flush()
+    assert said == [("Hello", "calm"), ("Run!", "urgent")]
+
+
+def test_say_buffered_timer_flushes(tts, said):
+    tts.BATCH_DELAY = 0.01
+
+    tts.say_buffered("Hello")
+    tts._flush_timer.join(1)
+
+    assert said == [("Hello", None)]
+
+
+def test_cache_round_trip(tts):
+    assert tts._cache_load("hello", None, "pcm") is None
+
+    tts._cache_save(b"\x01\x00" * 10, "hello", None, "pcm")
+
+    assert tts._cache_load("hello", None, "pcm") == b"\x01\x00" * 10
+    assert tts._cache_load("hello", "whisper", "pcm") is None
+    assert tts._cache_load("hello", None, "wav") is None
+
+
+def test_cache_key_includes_voice(tts):
+    tts._cache_save(b"\x01\x00", "hello", None, "pcm")
+    tts.set_voice(OpenAI_TTS.Voice.ECHO)
+
+    assert tts._cache_load("hello", None, "pcm") is None
+
+
+def test_cache_save_from_file(tts, tmp_path):
+    audio_file = tmp_path / "audio.mp3"
+    audio_file.write_bytes(b"ID3 audio")
+
+    tts._cache_save(str(audio_file), "hello", None, "mp3")
+
+    assert tts._cache_load("hello", None, "mp3") == b"ID3 audio"
+
+
+def test_cache_evicts_oldest(tts):
+    tts.CACHE_MAX_BYTES = 250
+    for i, words in enumerate(["one", "two", "three"]):
+        tts._cache_save(b"\x00" * 100, words, None, "pcm")
+        path = tts._cache_path(words, None, "pcm")
+        os.utime(path, (i, i))
+
+    tts._cache_save(b"\x00" * 100, "four", None, "pcm")
+
+    assert tts._cache_load("one", None, "pcm") is None
+    assert tts._cache_load("two", None, "pcm") is None
+    assert tts._cache_load("three", None, "pcm") is not None
+    assert tts._cache_load("four", None, "pcm") is not None
+
+
+def test_cache_disabled(tts):
+    tts._cache = False
+    tts._cache_save(b"\x01\x00", "hello", None, "pcm")
+
+    assert not os.path.exists(tts.CACHE_DIR)
+    assert tts._cache_load("hello", None, "pcm") is None
+
+
+def test_cache_tee_saves_after_last_chunk(tts):
+    chunks = tts._cache_tee(iter([b"\x01\x00", b"\x02\x00"]), "hello", None, "pcm")
+
+    assert next(chunks) == b"\x01\x00"
+    assert tts._cache_load("hello", None, "pcm") is None
+    assert list(chunks) == [b"\x02\x00"]
+    assert tts._cache_load("hello", None, "pcm") == b"\x01\x00\x02\x00"
@@ -0,0 +1,58 @@
+import wave
+
+import pytest
+
+vosk = pytest.importorskip("sunfounder_voice_assistant.stt.vosk")
+Vosk = vosk.Vosk
+
+
+def write_wav(path, pcm, extra=b""):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(pcm)
+    if extra:
+        # Put an extra chunk between fmt and data, like LIST metadata
+        data = path.read_bytes()
+        data = data[:36] + extra + data[36:]
+        data = data[:4] + (len(data) - 8).to_bytes(4, "little") + data[8:]
+        path.write_bytes(data)
+
+
+def test_read_pcm_chunks(tmp_path):
+    pcm = bytes(range(256)) * 100
+    path = tmp_path / "audio.wav"
+    write_wav(path, pcm)
+
+    chunks = list(Vosk._read_pcm(None, str(path), chunk_size=8000))
+
+    assert b"".join(chunks) == pcm
+    assert [len(chunk) for chunk in chunks] == [8000, 8000, 8000, 1600]
+
+
+def test_read_pcm_skips_extra_chunks(tmp_path):
+    pcm = b"\x01\x00" * 1000
+    path = tmp_path / "audio.wav"
+    # Odd sized chunk, padded to an even size
+    write_wav(path, pcm, extra=b"LIST" + (3).to_bytes(4, "little") + b"abc\x00")
+
+    assert b"".join(Vosk._read_pcm(None, str(path))) == pcm
+
+
+def test_read_pcm_ignores_trailing_chunks(tmp_path):
+    pcm = b"\x01\x00" * 1000
+    path = tmp_path / "audio.wav"
+    write_wav(path, pcm)
+    with open(path, "ab") as f:
+        f.write(b"id3 " + (4).to_bytes(4, "little") + b"tags")
+
+    assert b"".join(Vosk._read_pcm(None, str(path))) == pcm
+
+
+def test_read_pcm_no_data_chunk(tmp_path):
+    path = tmp_path / "audio.wav"
+    write_wav(path, b"")
+    path.write_bytes(path.read_bytes()[:36])
+
+    assert list(Vosk._read_pcm(None, str(path))) == []